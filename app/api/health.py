@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse, JSONResponse
+
+from app.api_clients.resilience import get_circuit_states
+from app.metrics.metrics import Gauge, register, render_prometheus
+from app.services.job_service.job_queue import job_queue
+from app.services.llm_service.llm_cache import llm_cache
+from app.services.startup_service.startup import startup
+from app.services.taiga_service.taiga_service import get_metadata_cache_stats
+
+router = APIRouter()
+
+register(Gauge(
+    "metadata_cache_lookups_total", "Taiga metadata cache lookups by result.",
+    lambda: {key: get_metadata_cache_stats()[key] for key in ("hits", "misses")}, label="result", metric_type="counter"
+))
+register(Gauge(
+    "llm_cache_lookups_total", "LLM response cache lookups by result.",
+    lambda: {key: llm_cache.stats()[key] for key in ("hits", "misses", "disk_hits")}, label="result", metric_type="counter"
+))
+register(Gauge("llm_cache_entries", "Entries held in the LLM response cache.", lambda: llm_cache.stats()["entries"]))
+register(Gauge("job_queue_depth", "Messages waiting in the job queue.", lambda: job_queue.stats()["depth"]))
+register(Gauge(
+    "jobs_total", "Jobs by final state.",
+    lambda: {key: job_queue.stats()[key] for key in ("submitted", "completed", "failed", "rejected")},
+    label="state", metric_type="counter"
+))
+register(Gauge("app_ready", "1 once startup warm-up has finished.", lambda: int(startup.ready)))
+register(Gauge("startup_stage_seconds", "Time taken by each import and warm-up stage.", lambda: startup.timings, label="stage"))
+register(Gauge(
+    "circuit_open", "1 when the circuit breaker for an upstream is not closed.",
+    lambda: {name: int(circuit["state"] != "closed") for name, circuit in get_circuit_states().items()},
+    label="upstream"
+))
+
+
+@router.get("/health")
+async def health():
+    circuits = get_circuit_states()
+    degraded = any(circuit["state"] != "closed" for circuit in circuits.values())
+    return {"status": "degraded" if degraded else "ok", "circuits": circuits}
+
+
+@router.get("/health/live")
+async def liveness():
+    """The process is up and serving requests, whether or not warm-up has finished."""
+    return {"status": "alive", "uptime": startup.snapshot()["uptime"]}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """503 until the metadata cache, story store and indexes have been warmed up."""
+    snapshot = startup.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of latency histograms, outcome counters and cache stats."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
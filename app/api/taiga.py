@@ -0,0 +1,31 @@
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.config import TAIGA_WEBHOOK_SECRET
+from app.logger.logger import log
+from app.services.taiga_service.taiga_webhook import verify_signature, apply_webhook_event
+
+router = APIRouter()
+
+
+@router.post("/webhook")
+async def taiga_webhook(request: Request):
+    if not TAIGA_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Taiga webhooks are not configured")
+
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-TAIGA-WEBHOOK-SIGNATURE")):
+        log.warning("Rejected Taiga webhook with an invalid signature")
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+
+    try:
+        return {"result": await apply_webhook_event(event)}
+    except Exception as e:
+        log.error("Error applying Taiga webhook: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,10 +1,18 @@
+import asyncio
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 
-from app.api_clients.taiga_client import get_user_story_by_id, get_task_by_id
+from app.config import BATCH_MAX_MESSAGES
 from app.logger.logger import log
-from app.services.taiga_service.taiga_service import get_all_user_stories, get_all_sub_tasks
-from app.services.taiga_service.task_manager import handle_teams_message
+from app.services.job_service.job_queue import job_queue, JobQueueFullError
+from app.services.llm_service.llm_cache import llm_cache
+from app.utils.utils import stream_json_array
+from app.services.taiga_service.taiga_service import iter_all_user_stories, get_all_sub_tasks, \
+    get_metadata_cache_stats, get_metadata_cache_entries, get_user_story_entry, get_sub_task_entry
+from app.services.taiga_service.task_manager import handle_teams_message, handle_teams_messages_batch
 
 router = APIRouter()
 
@@ -12,52 +20,100 @@ class TeamsMessage(BaseModel):
     message: str
 
 @router.post("/simulate")
-def process_teams_message(payload: TeamsMessage):
+async def process_teams_message(payload: TeamsMessage, wait: bool = False):
+    try:
+        if wait:
+            result = await handle_teams_message(payload.message)
+            return result
+
+        job = await job_queue.submit(payload.message)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job["id"], "status": job["status"], "status_url": f"/teams/jobs/{job['id']}"},
+        )
+
+    except JobQueueFullError:
+        raise HTTPException(status_code=503, detail="Too many messages in flight", headers={"Retry-After": "5"})
+
+    except Exception as e:
+        log.error("Error handling teams simulate: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router.post("/simulate/batch")
+async def process_teams_messages_batch(payload: list[TeamsMessage]):
+    # Batches are processed inline, outside the job queue's backpressure, so their size is capped
+    if len(payload) > BATCH_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_MESSAGES} messages per batch")
+
     try:
-        result = handle_teams_message(payload.message)
+        result = await handle_teams_messages_batch([item.message for item in payload])
         return result
 
     except Exception as e:
-        log.error(f"Error handling teams simulate: {str(e)}")
+        log.error("Error handling teams simulate batch: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@router.get("/jobs/stats")
+async def get_job_queue_stats():
+    return await job_queue.combined_stats()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/user_stories")
-def get_user_stories():
+async def get_user_stories(stream: bool = False, fields: Optional[str] = None):
     try:
-        result = get_all_user_stories()
-        return result
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        stories = await iter_all_user_stories(field_list)
+        if stream:
+            return StreamingResponse(stream_json_array(stories), media_type="application/json")
+        return await asyncio.to_thread(list, stories)
 
     except Exception as e:
-        log.error(f"Error handling User stories: {str(e)}")
+        log.error("Error handling User stories: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/user_stories/{story_id}")
-def get_user_story(story_id):
+async def get_user_story(story_id):
     try:
-        result = get_user_story_by_id(story_id)
+        result = await get_user_story_entry(int(story_id))
         return result
 
     except Exception as e:
-        log.error(f"Error handling User story: {str(e)}")
+        log.error("Error handling User story: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
 @router.get("/user_stories/{story_id}/tasks")
-def get_user_story_tasks(story_id):
+async def get_user_story_tasks(story_id):
     try:
-        result = get_all_sub_tasks(story_id)
+        result = await get_all_sub_tasks(int(story_id))
         return result
 
     except Exception as e:
-        log.error(f"Error handling User story tasks: {str(e)}")
+        log.error("Error handling User story tasks: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/tasks/{task_id}")
-def get_user_story_task(task_id):
+async def get_user_story_task(task_id):
     try:
-        result = get_task_by_id(task_id)
+        result = await get_sub_task_entry(int(task_id))
         return result
 
     except Exception as e:
-        log.error(f"Error handling User story tasks: {str(e)}")
+        log.error("Error handling User story tasks: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/cache/metadata")
+async def get_metadata_cache():
+    return {**get_metadata_cache_stats(), "entries": await get_metadata_cache_entries()}
+
+
+@router.get("/cache/llm")
+def get_llm_cache():
+    return llm_cache.stats()
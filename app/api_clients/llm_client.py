@@ -1,21 +1,104 @@
-from http import HTTPStatus
+import asyncio
+import json
+from typing import Callable, Optional
 
-import requests
+import httpx
 
-from app.config import OLLAMA_API_URL
+from app.config import (
+    OLLAMA_API_URL, OLLAMA_MODEL, OLLAMA_CONNECT_TIMEOUT, OLLAMA_TIMEOUT, OLLAMA_KEEP_ALIVE,
+    OLLAMA_MAX_CONCURRENCY, OLLAMA_MAX_CONNECTIONS
+)
+from app.api_clients.resilience import call_with_retry, ollama_breaker, CircuitOpenError
 from app.logger.logger import log
+from app.metrics.metrics import upstream_request_seconds, upstream_requests_total
 
+_client: httpx.AsyncClient | None = None
+_semaphore: asyncio.Semaphore | None = None
 
-def call_llm(prompt: str, model: str = "llama3") -> str:
-    """Internal helper to send a prompt to the LLM and return the response text."""
-    try:
-        response = requests.post(
-            OLLAMA_API_URL,
-            json={"model": model, "prompt": prompt, "stream": False},
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled Ollama client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=OLLAMA_MAX_CONNECTIONS, max_keepalive_connections=OLLAMA_MAX_CONNECTIONS),
         )
-        log.debug(f"LLM response: {response.status_code}")
-        response.raise_for_status()
-        return response.json().get("response", "").strip()
-    except requests.RequestException as e:
-        log.error(f"Error communicating with Ollama LLM: {e}", HTTPStatus.INTERNAL_SERVER_ERROR)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _generation_slot() -> asyncio.Semaphore:
+    """Semaphore capping in-flight generations so one Ollama instance is not overwhelmed."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def call_llm(
+        prompt: str, model: str = OLLAMA_MODEL, stop_when: Optional[Callable[[str], bool]] = None,
+        response_format: Optional[str] = None
+) -> str:
+    """Send a prompt to the LLM and return the response text.
+
+    With ``stop_when`` the answer is streamed and the stream is closed as soon as the predicate accepts
+    the text received so far, which ends the generation early for short, well-known answers.
+    ``response_format="json"`` asks Ollama to constrain the output to valid JSON.
+    """
+    payload = {"model": model, "prompt": prompt, "stream": stop_when is not None, "keep_alive": OLLAMA_KEEP_ALIVE}
+    if response_format:
+        payload["format"] = response_format
+    endpoint = "generate_stream" if stop_when is not None else "generate"
+    status = "error"
+    try:
+        with upstream_request_seconds.time(upstream="ollama", endpoint=endpoint):
+            if stop_when is None:
+                response = await call_with_retry(ollama_breaker, lambda: _post_llm(payload))
+                log.debug("LLM response: %s", response.status_code)
+                status = str(response.status_code)
+                response.raise_for_status()
+                return response.json().get("response", "").strip()
+
+            text = await call_with_retry(ollama_breaker, lambda: _stream_llm(payload, stop_when))
+            status = "200"
+            return text
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        if isinstance(e, httpx.HTTPStatusError):
+            status = str(e.response.status_code)
+        elif isinstance(e, CircuitOpenError):
+            status = "circuit_open"
+        log.error("Error communicating with Ollama LLM: %s", e)
         raise RuntimeError("Failed to communicate with LLM")
+    finally:
+        upstream_requests_total.inc(upstream="ollama", endpoint=endpoint, status=status)
+
+
+# Each attempt takes its own generation slot, so a request backing off between retries does not hold one
+async def _post_llm(payload: dict) -> httpx.Response:
+    async with _generation_slot():
+        return await get_http_client().post(OLLAMA_API_URL, json=payload)
+
+
+async def _stream_llm(payload: dict, stop_when: Callable[[str], bool]) -> str:
+    text = ""
+    async with _generation_slot(), get_http_client().stream("POST", OLLAMA_API_URL, json=payload) as response:
+        log.debug("LLM stream response: %s", response.status_code)
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            text += chunk.get("response", "")
+            if chunk.get("done"):
+                break
+            if stop_when(text.strip()):
+                log.debug("Stopped LLM stream early after '%s'", text.strip())
+                break
+    return text.strip()
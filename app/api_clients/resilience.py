@@ -0,0 +1,151 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app.config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+)
+from app.logger.logger import log
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuses and errors that guarantee the upstream did not act on the request, so even writes can be retried
+UNPROCESSED_STATUSES = {429, 503}
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive failures, then lets a trial call through after ``reset_timeout``.
+
+    While the trial is in flight every other caller still fails fast. A trial that never reports back (for example
+    because it was cancelled) is given up on after another ``reset_timeout`` and the next caller becomes the trial.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_started: Optional[float] = None
+
+    def before_call(self) -> None:
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit for {self.name} is open")
+            self.state = "half_open"
+            log.info("Circuit for %s is half-open. Trying a call.", self.name)
+        elif now - self.trial_started < self.reset_timeout:
+            raise CircuitOpenError(f"Circuit for {self.name} is half-open and waiting on a trial call")
+        self.trial_started = now
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            log.info("Circuit for %s closed", self.name)
+        self.state, self.failures, self.opened_at, self.trial_started = "closed", 0, None, None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                log.warning("Circuit for %s opened after %s consecutive failures", self.name, self.failures)
+            self.state, self.opened_at, self.trial_started = "open", time.monotonic(), None
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_in": retry_in}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt number."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def retry_after_delay(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0.0), RETRY_MAX_DELAY)
+
+
+async def call_with_retry(
+        breaker: CircuitBreaker, send: Callable[[], Awaitable], idempotent: bool = True,
+        max_attempts: int = RETRY_MAX_ATTEMPTS
+):
+    """Run ``send`` through the circuit breaker, retrying transient failures with jittered backoff.
+
+    ``send`` returns an ``httpx.Response`` or raises an ``httpx`` error. Retryable responses are returned
+    as-is after the last attempt so the caller's ``raise_for_status`` still reports them.
+    Non-idempotent calls are only retried when the upstream cannot have processed the request.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        response = None
+        try:
+            result = await send()
+            response = result if isinstance(result, httpx.Response) else None
+            if response is None or response.status_code not in RETRYABLE_STATUSES:
+                breaker.record_success()
+                return result
+        except httpx.HTTPStatusError as e:
+            response = e.response
+            if response.status_code not in RETRYABLE_STATUSES:
+                breaker.record_success()
+                raise
+            error = e
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            if attempt >= max_attempts or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                raise
+            delay = backoff_delay(attempt)
+            log.warning("%s request failed (%r). Retry %s/%s in %.2fs", breaker.name, e, attempt, max_attempts - 1, delay)
+            await asyncio.sleep(delay)
+            continue
+        else:
+            error = None
+
+        # Throttling means the upstream is alive, so only server errors count against the breaker,
+        # and a throttled trial call closes it; otherwise the trial's own retry would find it half-open
+        if response.status_code != 429:
+            breaker.record_failure()
+        elif breaker.state == "half_open":
+            breaker.record_success()
+        if attempt >= max_attempts or not (idempotent or response.status_code in UNPROCESSED_STATUSES):
+            if error is not None:
+                raise error
+            return result
+        delay = retry_after_delay(response) or backoff_delay(attempt)
+        log.warning(
+            "%s returned %s. Retry %s/%s in %.2fs", breaker.name, response.status_code, attempt, max_attempts - 1, delay
+        )
+        await asyncio.sleep(delay)
+
+
+taiga_breaker = CircuitBreaker("taiga", CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+ollama_breaker = CircuitBreaker("ollama", CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+
+
+def get_circuit_states() -> dict:
+    return {breaker.name: breaker.snapshot() for breaker in (taiga_breaker, ollama_breaker)}
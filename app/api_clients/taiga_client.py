@@ -1,141 +1,282 @@
-import requests
-from app.config import TAIGA_API_URL
+from typing import AsyncIterator
+
+import httpx
+
+from app.config import (
+    TAIGA_API_URL, TAIGA_CONNECT_TIMEOUT, TAIGA_READ_TIMEOUT, TAIGA_LIST_TIMEOUT, TAIGA_WRITE_TIMEOUT,
+    TAIGA_MAX_CONNECTIONS, TAIGA_MAX_KEEPALIVE_CONNECTIONS, TAIGA_KEEPALIVE_EXPIRY, TAIGA_PAGE_SIZE
+)
+from app.api_clients.resilience import call_with_retry, taiga_breaker
 from app.logger.logger import log
+from app.metrics.metrics import upstream_request_seconds, upstream_requests_total, endpoint_label
 from app.services.taiga_service.taiga_auth import get_taiga_token
 
+_TIMEOUTS = {
+    "read": httpx.Timeout(TAIGA_READ_TIMEOUT, connect=TAIGA_CONNECT_TIMEOUT),
+    "list": httpx.Timeout(TAIGA_LIST_TIMEOUT, connect=TAIGA_CONNECT_TIMEOUT),
+    "write": httpx.Timeout(TAIGA_WRITE_TIMEOUT, connect=TAIGA_CONNECT_TIMEOUT),
+}
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=TAIGA_API_URL,
+            timeout=_TIMEOUTS["read"],
+            limits=httpx.Limits(
+                max_connections=TAIGA_MAX_CONNECTIONS,
+                max_keepalive_connections=TAIGA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=TAIGA_KEEPALIVE_EXPIRY,
+            ),
+        )
+        log.debug("Created Taiga HTTP client (max connections: %s)", TAIGA_MAX_CONNECTIONS)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        log.debug("Closed Taiga HTTP client")
+
 
-def taiga_auth_headers():
-    return {"Authorization": f"Bearer {get_taiga_token()}"}
+async def _send(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send an authenticated request with retries, refreshing the token and retrying once on 401."""
+    client = get_http_client()
+    idempotent = method in ("GET", "HEAD", "PUT", "DELETE")
+    headers = kwargs.pop("headers", None) or {}
 
+    async def send_with(token: str) -> httpx.Response:
+        return await call_with_retry(
+            taiga_breaker,
+            lambda: client.request(method, url, headers={**headers, "Authorization": f"Bearer {token}"}, **kwargs),
+            idempotent=idempotent,
+        )
 
-def get_project_by_slug(slug: str) -> dict:
+    endpoint = f"{method} {endpoint_label(url)}"
+    status = "error"
     try:
-        url = f"{TAIGA_API_URL}/projects/by_slug?slug={slug}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        with upstream_request_seconds.time(upstream="taiga", endpoint=endpoint):
+            token = await get_taiga_token(client)
+            response = await send_with(token)
+            if response.status_code == 401:
+                log.info("Taiga rejected the auth token for %s %s. Retrying with a fresh token.", method, url)
+                response = await send_with(await get_taiga_token(client, stale_token=token))
+        status = str(response.status_code)
+        return response
+    finally:
+        upstream_requests_total.inc(upstream="taiga", endpoint=endpoint, status=status)
+
+
+async def get_project_by_slug(slug: str) -> dict:
+    try:
+        response = await _send("GET", "/projects/by_slug", params={"slug": slug})
         response.raise_for_status()
         log.debug("Fetched project by slug")
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching project: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error fetching project: %s", e)
         raise
 
 
-def get_user_stories(project_id: int) -> list:
-    try:
-        url = f"{TAIGA_API_URL}/userstories?project={project_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+async def iter_pages(path: str, params: dict, headers: dict | None = None) -> AsyncIterator[dict]:
+    """Yield items from a paginated Taiga list endpoint, following the ``x-pagination-next`` header."""
+    url, params = path, {**params, "page_size": TAIGA_PAGE_SIZE}
+    page = 0
+    while url:
+        response = await _send("GET", url, params=params, headers=headers, timeout=_TIMEOUTS["list"])
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching user stories: {e}")
+        page += 1
+        for item in response.json():
+            yield item
+        # The next-page URL already carries the query string
+        url, params = response.headers.get("x-pagination-next"), None
+    log.debug("Fetched %s page(s) from %s", page, path)
+
+
+async def iter_user_stories(project_id: int, modified_since: str | None = None) -> AsyncIterator[dict]:
+    params = {"project": project_id}
+    if modified_since:
+        params["modified_date__gt"] = modified_since
+    try:
+        async for story in iter_pages("/userstories", params):
+            yield story
+    except httpx.HTTPError as e:
+        log.error("Error fetching user stories: %s", e)
         raise
 
-def get_user_story_by_id(story_id: int) -> list:
+
+async def get_user_story_by_id(story_id: int) -> list:
     try:
-        url = f"{TAIGA_API_URL}/userstories/{story_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        response = await _send("GET", f"/userstories/{story_id}")
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching user story: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error fetching user story: %s", e)
         raise
 
-def get_task_by_id(task_id: int) -> list:
+async def get_task_by_id(task_id: int) -> list:
     try:
-        url = f"{TAIGA_API_URL}/tasks/{task_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        response = await _send("GET", f"/tasks/{task_id}")
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching task: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error fetching task: %s", e)
         raise
 
 
-def get_userstory_statuses(project_id: int) -> list:
+async def get_userstory_statuses(project_id: int) -> list:
     try:
-        url = f"{TAIGA_API_URL}/userstory-statuses?project={project_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        response = await _send("GET", "/userstory-statuses", params={"project": project_id})
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching user story statuses: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error fetching user story statuses: %s", e)
         raise
 
 
-def get_task_statuses(project_id: int) -> list:
+async def get_task_statuses(project_id: int) -> list:
     try:
-        url = f"{TAIGA_API_URL}/task-statuses?project={project_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        response = await _send("GET", "/task-statuses", params={"project": project_id})
         response.raise_for_status()
         log.debug("Fetched task statuses")
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching task statuses: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error fetching task statuses: %s", e)
         raise
 
 
-def create_user_story(payload: dict) -> dict:
+async def create_user_story(payload: dict) -> dict:
     try:
-        response = requests.post(
-            f"{TAIGA_API_URL}/userstories",
+        response = await _send(
+            "POST", "/userstories",
             json=payload,
-            headers=taiga_auth_headers(),
-            timeout=300
+            timeout=_TIMEOUTS["write"]
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        log.error("Error creating user story: %s", e)
+        raise
+
+
+async def bulk_create_user_stories(project_id: int, status_id: int, subjects: list[str]) -> list[dict]:
+    """Create one user story per subject in a single call; Taiga only sets the subject and status."""
+    try:
+        response = await _send(
+            "POST", "/userstories/bulk_create",
+            json={"project_id": project_id, "status_id": status_id, "bulk_stories": "\n".join(subjects)},
+            timeout=_TIMEOUTS["write"]
         )
         response.raise_for_status()
+        log.info("Created %s user stories in bulk", len(subjects))
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error creating user story: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error bulk creating user stories: %s", e)
         raise
 
 
-def get_tasks_for_story(story_id: int) -> list[dict]:
+async def update_user_story(story_id: int, payload: dict) -> dict:
+    """Patch a user story; ``payload`` must carry the story's current ``version``."""
     try:
-        url = f"{TAIGA_API_URL}/tasks?user_story={story_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        response = await _send("PATCH", f"/userstories/{story_id}", json=payload, timeout=_TIMEOUTS["write"])
         response.raise_for_status()
-        log.debug(f"Fetched tasks for story ID {story_id}")
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error fetching tasks for story {story_id}: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error updating user story %s: %s", story_id, e)
+        raise
+
+
+async def get_tasks_for_story(story_id: int) -> list[dict]:
+    try:
+        # One story's tasks fit in a single response, so ask Taiga not to paginate them
+        tasks = [
+            task async for task in iter_pages("/tasks", {"user_story": story_id}, {"x-disable-pagination": "True"})
+        ]
+        log.debug("Fetched tasks for story ID %s", story_id)
+        return tasks
+    except httpx.HTTPError as e:
+        log.error("Error fetching tasks for story %s: %s", story_id, e)
+        raise
+
+
+async def iter_tasks(project_id: int, modified_since: str | None = None) -> AsyncIterator[dict]:
+    params = {"project": project_id}
+    if modified_since:
+        params["modified_date__gt"] = modified_since
+    try:
+        async for task in iter_pages("/tasks", params):
+            yield task
+    except httpx.HTTPError as e:
+        log.error("Error fetching tasks for project %s: %s", project_id, e)
         raise
 
 
-def create_task(payload: dict) -> dict:
+async def create_task(payload: dict) -> dict:
     try:
-        response = requests.post(
-            f"{TAIGA_API_URL}/tasks",
+        response = await _send(
+            "POST", "/tasks",
             json=payload,
-            headers=taiga_auth_headers()
+            timeout=_TIMEOUTS["write"]
         )
         response.raise_for_status()
-        log.info(f"Sub-task created under story {payload.get('user_story')}")
+        log.info("Sub-task created under story %s", payload.get('user_story'))
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error creating sub-task: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error creating sub-task: %s", e)
         raise
 
 
-def create_userstory_task(userstory_id: int, payload: dict) -> dict:
+async def create_userstory_task(userstory_id: int, payload: dict) -> dict:
     try:
         payload["user_story"] = userstory_id
-        response = requests.post(
-            f"{TAIGA_API_URL}/tasks",
+        response = await _send(
+            "POST", "/tasks",
             json=payload,
-            headers=taiga_auth_headers()
+            timeout=_TIMEOUTS["write"]
         )
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error creating sub-task: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error creating sub-task: %s", e)
+        raise
+
+async def bulk_create_tasks(project_id: int, story_id: int, status_id: int, subjects: list[str]) -> list[dict]:
+    """Create one sub-task per subject under a story in a single call; Taiga only sets the subject and status."""
+    try:
+        response = await _send(
+            "POST", "/tasks/bulk_create",
+            json={"project_id": project_id, "us_id": story_id, "status_id": status_id, "bulk_tasks": "\n".join(subjects)},
+            timeout=_TIMEOUTS["write"]
+        )
+        response.raise_for_status()
+        log.info("Created %s sub-tasks in bulk under story %s", len(subjects), story_id)
+        return response.json()
+    except httpx.HTTPError as e:
+        log.error("Error bulk creating sub-tasks: %s", e)
+        raise
+
+
+async def update_task(task_id: int, payload: dict) -> dict:
+    """Patch a sub-task; ``payload`` must carry the task's current ``version``."""
+    try:
+        response = await _send("PATCH", f"/tasks/{task_id}", json=payload, timeout=_TIMEOUTS["write"])
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        log.error("Error updating sub-task %s: %s", task_id, e)
         raise
 
-def get_priorities(project_id: int) -> list[dict]:
+async def get_priorities(project_id: int) -> list[dict]:
     try:
-        url = f"{TAIGA_API_URL}/priorities?project={project_id}"
-        response = requests.get(url, headers=taiga_auth_headers())
+        response = await _send("GET", "/priorities", params={"project": project_id})
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
-        log.error(f"Error getting priorities: {e}")
+    except httpx.HTTPError as e:
+        log.error("Error getting priorities: %s", e)
         raise
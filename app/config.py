@@ -5,9 +5,95 @@ load_dotenv()
 
 TAIGA_API_URL = "https://api.taiga.io/api/v1"
 TAIGA_PROJECT_SLUG = os.getenv("TAIGA_PROJECT_SLUG")
+TAIGA_METADATA_CACHE_TTL = int(os.getenv("TAIGA_METADATA_CACHE_TTL", "600"))
 
 TAIGA_USERNAME = os.getenv("TAIGA_USERNAME")
 TAIGA_PASSWORD = os.getenv("TAIGA_PASSWORD")
+TAIGA_WEBHOOK_SECRET = os.getenv("TAIGA_WEBHOOK_SECRET")
 
-OLLAMA_API_URL = os.getenv("OLLAMA_API_URL")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL")
\ No newline at end of file
+TAIGA_TOKEN_TTL = float(os.getenv("TAIGA_TOKEN_TTL", "3600"))
+TAIGA_TOKEN_REFRESH_MARGIN = float(os.getenv("TAIGA_TOKEN_REFRESH_MARGIN", "300"))
+
+TAIGA_CONNECT_TIMEOUT = float(os.getenv("TAIGA_CONNECT_TIMEOUT", "5"))
+TAIGA_READ_TIMEOUT = float(os.getenv("TAIGA_READ_TIMEOUT", "15"))
+TAIGA_LIST_TIMEOUT = float(os.getenv("TAIGA_LIST_TIMEOUT", "60"))
+TAIGA_WRITE_TIMEOUT = float(os.getenv("TAIGA_WRITE_TIMEOUT", "300"))
+TAIGA_PAGE_SIZE = int(os.getenv("TAIGA_PAGE_SIZE", "100"))
+TAIGA_BULK_CREATE = os.getenv("TAIGA_BULK_CREATE", "false").lower() == "true"
+TAIGA_BULK_WINDOW = float(os.getenv("TAIGA_BULK_WINDOW", "0.05"))
+TAIGA_BULK_MAX_SIZE = int(os.getenv("TAIGA_BULK_MAX_SIZE", "50"))
+
+TAIGA_MAX_CONNECTIONS = int(os.getenv("TAIGA_MAX_CONNECTIONS", "100"))
+TAIGA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("TAIGA_MAX_KEEPALIVE_CONNECTIONS", "20"))
+TAIGA_KEEPALIVE_EXPIRY = float(os.getenv("TAIGA_KEEPALIVE_EXPIRY", "30"))
+
+CONCURRENT_ENRICHMENT = os.getenv("CONCURRENT_ENRICHMENT", "true").lower() == "true"
+
+EMBEDDING_INDEX_ENABLED = os.getenv("EMBEDDING_INDEX_ENABLED", "true").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+DEDUP_TOP_K = int(os.getenv("DEDUP_TOP_K", "5"))
+DEDUP_DUPLICATE_THRESHOLD = float(os.getenv("DEDUP_DUPLICATE_THRESHOLD", "0.92"))
+DEDUP_CANDIDATE_THRESHOLD = float(os.getenv("DEDUP_CANDIDATE_THRESHOLD", "0.5"))
+TEXT_MATCH_MIN_LENGTH = int(os.getenv("TEXT_MATCH_MIN_LENGTH", "12"))
+
+STORY_STORE_PATH = os.getenv(
+    "STORY_STORE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "taiga_mirror.sqlite3")
+)
+STORY_STORE_SYNC_INTERVAL = float(os.getenv("STORY_STORE_SYNC_INTERVAL", "30"))
+STORY_STORE_FULL_SYNC_INTERVAL = float(os.getenv("STORY_STORE_FULL_SYNC_INTERVAL", "3600"))
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "3600"))
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "50"))
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "10"))
+LLM_STREAM_SHORT_ANSWERS = os.getenv("LLM_STREAM_SHORT_ANSWERS", "true").lower() == "true"
+LLM_SINGLE_SHOT = os.getenv("LLM_SINGLE_SHOT", "false").lower() == "true"
+TRACE_ID_HEADER = os.getenv("TRACE_ID_HEADER", "X-Request-ID")
+
+APP_ENV = os.getenv("APP_ENV", "development").lower()
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1" if APP_ENV == "development" else "4"))
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if APP_ENV == "development" else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text" if APP_ENV == "development" else "json").lower()
+# Several workers rotating one file would clobber each other's output, so they log to stderr by default
+LOG_TO_FILE = os.getenv(
+    "LOG_TO_FILE", "true" if APP_ENV == "development" or WEB_WORKERS == 1 else "false"
+).lower() == "true"
+LOG_FILE = os.getenv(
+    "LOG_FILE", os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "teams_taiga_integration.log")
+)
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_TO_CONSOLE = os.getenv("LOG_TO_CONSOLE", "false").lower() == "true"
+
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "memory").lower()
+SHARED_CACHE_PATH = os.getenv(
+    "SHARED_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "shared_cache.sqlite3")
+)
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "redis://localhost:6379/0")
+SHARED_CACHE_NAMESPACE = os.getenv("SHARED_CACHE_NAMESPACE", "teams_taiga")
+DEDUP_LOCK_TTL = float(os.getenv("DEDUP_LOCK_TTL", "120"))
+IDEMPOTENCY_WINDOW = float(os.getenv("IDEMPOTENCY_WINDOW", "120"))
\ No newline at end of file
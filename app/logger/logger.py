@@ -1,21 +1,95 @@
+import atexit
+import json
 import logging
-from pathlib import Path
+import logging.handlers
+import queue
+from contextvars import ContextVar
+
+from app.config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_TO_FILE, LOG_FILE, LOG_ROTATION, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUP_COUNT,
+    LOG_TO_CONSOLE
+)
 from app.utils.utils import create_folder
 
+# Set per request by the trace middleware and copied into job workers; "-" outside a request
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - [%(trace_id)s] %(filename)s:%(lineno)d - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamp every record with the current trace ID so one message can be followed through the log."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
 class Logger:
-    project_base_path = Path(__file__).parent.parent.parent
-    log_file_path = f"{project_base_path}/logs"
-    create_folder(file_path=log_file_path)
+    """Root logging set up so request handlers only enqueue records; a listener thread formats and writes them."""
+
+    def __init__(self):
+        self.listener: logging.handlers.QueueListener | None = None
+
+    def setup(self) -> None:
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+        handlers = []
+        if LOG_TO_FILE:
+            create_folder(file_path=LOG_FILE)
+            handlers.append(self._file_handler())
+        if LOG_TO_CONSOLE or not LOG_TO_FILE:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # Unbounded, so a slow disk never blocks the event loop
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.addFilter(TraceIdFilter())
+
+        root = logging.getLogger()
+        root.handlers = [queue_handler]
+        root.setLevel(LOG_LEVEL)
+        self.listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Flush queued records and stop the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
 
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s",
-        filename=f"{log_file_path}/teams_taiga_integration.log",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    @staticmethod
+    def _file_handler() -> logging.Handler:
+        if LOG_ROTATION == "time":
+            return logging.handlers.TimedRotatingFileHandler(
+                LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+        return logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
 
 
 logger = Logger()
+logger.setup()
 log = logging
-log.info("Logger initiated!")
+log.info("Logger initiated (level %s, format %s)", LOG_LEVEL, LOG_FORMAT)
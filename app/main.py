@@ -1,9 +1,51 @@
-from fastapi import FastAPI
+import time
+
+# Taken before the other imports, so the startup timings include them
+_import_started = time.perf_counter()
+
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import teams
+from app.api import teams, health, taiga
+from app.config import TRACE_ID_HEADER, WEB_WORKERS, APP_ENV
+from app.logger.logger import log, trace_id_var
+from app.api_clients import llm_client, taiga_client
+from app.services.cache_service.shared_cache import shared_cache
+from app.services.job_service.job_queue import job_queue
+from app.services.startup_service.startup import startup
+from app.services.taiga_service.taiga_service import warm_up_metadata_cache, sync_story_store, start_store_sync, \
+    stop_store_sync
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await job_queue.start()
+
+    if APP_ENV != "development" and WEB_WORKERS > 1 and shared_cache.is_local:
+        log.warning(
+            "Running %s workers with the in-process shared cache: tokens, metadata, dedup locks and jobs are not shared. "
+            "Set SHARED_CACHE_BACKEND to sqlite or redis.", WEB_WORKERS
+        )
+
+    # Warm-up runs after the server starts listening; /health/ready reports when it is done
+    startup.start_warm_up([
+        ("metadata_cache", warm_up_metadata_cache),
+        ("story_store", lambda: sync_story_store(full=True)),
+    ])
+    start_store_sync()
+    yield
 
-app = FastAPI()
+    await stop_store_sync()
+    await startup.stop()
+    await job_queue.stop()
+    await taiga_client.close_http_client()
+    await llm_client.close_http_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,5 +55,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Tag the request's log lines with the caller's trace ID, or a fresh one, and echo it back."""
+    trace_id = request.headers.get(TRACE_ID_HEADER) or uuid.uuid4().hex[:16]
+    token = trace_id_var.set(trace_id)
+    try:
+        response = await call_next(request)
+    finally:
+        trace_id_var.reset(token)
+    response.headers[TRACE_ID_HEADER] = trace_id
+    return response
+
+
 # 👇 Mount your Teams router with the /teams prefix
 app.include_router(teams.router, prefix="/teams")
+app.include_router(taiga.router, prefix="/taiga")
+app.include_router(health.router)
+
+
+startup.record("import", time.perf_counter() - _import_started)
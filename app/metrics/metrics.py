@@ -0,0 +1,141 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help_text, self.labels, self.buckets = name, help_text, labels, buckets
+        self._series: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        label_names = self.labels + ("le",)
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(label_names, key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(label_names, key + ('+Inf',))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time; the callback returns a number or a {label value: number} dict."""
+
+    def __init__(self, name: str, help_text: str, collect: Callable, label: str = "", metric_type: str = "gauge"):
+        self.name, self.help_text, self.collect, self.label, self.metric_type = name, help_text, collect, label, metric_type
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        value = self.collect()
+        if isinstance(value, dict):
+            for label_value, number in sorted(value.items()):
+                lines.append(f"{self.name}{_format_labels((self.label,), (label_value,))} {number}")
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+_registry: list = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in _registry:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            lines.append(f"# {metric.name} unavailable: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def endpoint_label(url: str) -> str:
+    """Reduce a request URL to a low-cardinality path template, e.g. ``/userstories/{id}``."""
+    path = re.sub(r"^https?://[^/]+", "", str(url)).split("?")[0]
+    path = re.sub(r"^/api/v1", "", path)
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path) or "/"
+
+
+upstream_request_seconds = register(Histogram(
+    "upstream_request_seconds", "Latency of calls to Taiga and Ollama.", ("upstream", "endpoint")
+))
+upstream_requests_total = register(Counter(
+    "upstream_requests_total", "Calls to Taiga and Ollama by response status.", ("upstream", "endpoint", "status")
+))
+pipeline_stage_seconds = register(Histogram(
+    "pipeline_stage_seconds", "Latency of each stage of Teams message handling.", ("stage",)
+))
+teams_messages_total = register(Counter(
+    "teams_messages_total", "Processed Teams messages by outcome.", ("outcome",)
+))
+coalesced_messages_total = register(Counter(
+    "coalesced_messages_total", "Messages answered from an identical in-flight or recent message.", ("source",)
+))
+webhook_events_total = register(Counter(
+    "webhook_events_total", "Taiga webhook events by type, action and result.", ("type", "action", "result")
+))
+write_batch_size = register(Histogram(
+    "write_batch_size", "Creates sent to Taiga per request by the write batcher.", ("kind",),
+    buckets=(1, 2, 5, 10, 20, 50, 100)
+))
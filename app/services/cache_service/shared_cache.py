@@ -0,0 +1,203 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from app.config import SHARED_CACHE_BACKEND, SHARED_CACHE_PATH, SHARED_CACHE_URL, SHARED_CACHE_NAMESPACE
+from app.logger.logger import log
+from app.utils.utils import create_folder
+
+
+class MemoryBackend:
+    """Process-local backend; the default for a single worker."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._entries: dict[str, tuple[Optional[float], str]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.time() + ttl if ttl else None, value)
+
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._entries[key] = (time.time() + ttl, value)
+        return True
+
+    async def delete(self, key: str, expected: Optional[str] = None) -> None:
+        if expected is None or self._live(key) == expected:
+            self._entries.pop(key, None)
+
+    async def keys(self, prefix: str) -> list[str]:
+        return [key for key in list(self._entries) if key.startswith(prefix) and self._live(key) is not None]
+
+
+class SQLiteBackend:
+    """Backend shared by every worker on one host through a SQLite file."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            create_folder(file_path=path)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def _run(self, query: str, params: tuple, result: Callable[[sqlite3.Cursor], Any]) -> Any:
+        with self._lock:
+            return result(self._conn.execute(query, params))
+
+    async def _execute(
+            self, query: str, params: tuple = (), result: Callable[[sqlite3.Cursor], Any] = lambda cursor: None
+    ) -> Any:
+        # sqlite3 blocks, and may wait on another worker's write lock, so it never runs on the event loop
+        return await asyncio.to_thread(self._run, query, params, result)
+
+    async def get(self, key: str) -> Optional[str]:
+        row = await self._execute(
+            "SELECT value FROM shared_cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time()),
+            sqlite3.Cursor.fetchone,
+        )
+        return row[0] if row else None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self._execute(
+            "INSERT OR REPLACE INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl if ttl else None),
+        )
+
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        now = time.time()
+        # A single statement, so two workers cannot both take an expired key
+        rowcount = await self._execute(
+            "INSERT INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE shared_cache.expires_at IS NOT NULL AND shared_cache.expires_at <= ?",
+            (key, value, now + ttl, now), lambda cursor: cursor.rowcount,
+        )
+        return rowcount == 1
+
+    async def delete(self, key: str, expected: Optional[str] = None) -> None:
+        if expected is None:
+            await self._execute("DELETE FROM shared_cache WHERE key = ?", (key,))
+        else:
+            await self._execute("DELETE FROM shared_cache WHERE key = ? AND value = ?", (key, expected))
+
+    async def keys(self, prefix: str) -> list[str]:
+        rows = await self._execute(
+            "SELECT key FROM shared_cache WHERE substr(key, 1, ?) = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (len(prefix), prefix, time.time()), sqlite3.Cursor.fetchall,
+        )
+        return [row[0] for row in rows]
+
+
+class RedisBackend:
+    """Backend shared across hosts through any Redis-compatible server; needs the optional ``redis`` package."""
+
+    name = "redis"
+
+    _DELETE_IF = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        return bool(await self._redis.set(key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, key: str, expected: Optional[str] = None) -> None:
+        if expected is None:
+            await self._redis.delete(key)
+        else:
+            await self._redis.eval(self._DELETE_IF, 1, key, expected)
+
+    async def keys(self, prefix: str) -> list[str]:
+        return [key async for key in self._redis.scan_iter(match=f"{prefix}*")]
+
+
+class SharedCache:
+    """JSON key/value store with TTLs and short-lived locks, shared by all workers when the backend allows it."""
+
+    def __init__(self, backend, namespace: str):
+        self.backend = backend
+        self._prefix = f"{namespace}:"
+
+    @property
+    def is_local(self) -> bool:
+        return isinstance(self.backend, MemoryBackend)
+
+    async def get(self, key: str) -> Any:
+        value = await self.backend.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self.backend.set(self._prefix + key, json.dumps(value), ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.backend.delete(self._prefix + key)
+
+    async def keys(self, prefix: str = "") -> list[str]:
+        return sorted(key[len(self._prefix):] for key in await self.backend.keys(self._prefix + prefix))
+
+    async def acquire_lock(self, name: str, ttl: float, timeout: float = 0, poll: float = 0.1) -> Optional[str]:
+        """Take the lock ``name`` for at most ``ttl`` seconds, waiting up to ``timeout``.
+
+        Returns a token for ``release_lock``, or None if the lock is still held by someone else.
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            if await self.backend.add(f"{self._prefix}lock:{name}", token, ttl):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(poll)
+
+    async def release_lock(self, name: str, token: str) -> None:
+        """Release a lock, unless it already expired and was taken by someone else."""
+        await self.backend.delete(f"{self._prefix}lock:{name}", expected=token)
+
+
+def _create_backend():
+    if SHARED_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(SHARED_CACHE_PATH)
+    if SHARED_CACHE_BACKEND == "redis":
+        try:
+            return RedisBackend(SHARED_CACHE_URL)
+        except ImportError:
+            log.warning("redis is not installed. Falling back to the in-process shared cache.")
+    elif SHARED_CACHE_BACKEND != "memory":
+        log.warning("Unknown SHARED_CACHE_BACKEND '%s'. Using the in-process shared cache.", SHARED_CACHE_BACKEND)
+    return MemoryBackend()
+
+
+shared_cache = SharedCache(_create_backend(), SHARED_CACHE_NAMESPACE)
+log.info("Shared cache backend: %s", shared_cache.backend.name)
@@ -0,0 +1,190 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from app.config import JOB_WORKERS, JOB_QUEUE_SIZE, JOB_RETENTION
+from app.logger.logger import log, trace_id_var
+from app.metrics.metrics import pipeline_stage_seconds
+from app.services.cache_service.shared_cache import shared_cache
+from app.services.taiga_service.task_manager import handle_teams_message, is_handled
+
+# How often each process publishes its queue stats, and how long they outlive a process that stopped publishing
+_STATS_INTERVAL = 5.0
+_STATS_TTL = 3 * _STATS_INTERVAL
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the queue is at capacity and the caller should retry later."""
+
+
+class JobQueue:
+    """Bounded in-process queue that runs a message handler on a fixed pool of worker tasks.
+
+    A job fails when the handler raises or when ``succeeded`` rejects the result it returned. Job records live in
+    the shared cache for ``retention`` seconds after their last update, so any worker process can report on them.
+    """
+
+    def __init__(
+            self, handler: Callable[[str], Awaitable[dict]], workers: int, max_size: int, retention: float,
+            succeeded: Callable[[dict], bool] = lambda result: True
+    ):
+        self._handler = handler
+        self._succeeded = succeeded
+        self._worker_count = workers
+        self._max_size = max_size
+        self._retention = retention
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._process_id = uuid.uuid4().hex
+        self._running = 0
+        self._wait_times: deque = deque(maxlen=500)
+        self._processing_times: deque = deque(maxlen=500)
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_size)
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self._worker_count)]
+        self._workers.append(asyncio.create_task(self._publish_stats()))
+        log.info("Started job queue with %s workers (max size %s)", self._worker_count, self._max_size)
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        log.info("Stopped job queue")
+
+    async def submit(self, message: str) -> dict:
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self._queue.full():
+            self._reject()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "message": message,
+            "result": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "trace_id": trace_id_var.get(),
+        }
+        # Saved before it is queued, so a worker's later updates cannot be overwritten by this one
+        await self._save(job)
+        try:
+            self._queue.put_nowait((job, time.monotonic()))
+        except asyncio.QueueFull:
+            await shared_cache.delete(f"job:{job['id']}")
+            self._reject()
+        self._counters["submitted"] += 1
+        return job
+
+    def _reject(self) -> None:
+        self._counters["rejected"] += 1
+        log.warning("Job queue full (%s). Rejecting message.", self._max_size)
+        raise JobQueueFullError("Job queue is full")
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await shared_cache.get(f"job:{job_id}")
+
+    def stats(self) -> dict:
+        """Stats of this process's queue."""
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self._max_size,
+            "workers": self._worker_count,
+            "running": self._running,
+            **self._counters,
+            "wait_time": _summarize(self._wait_times),
+            "processing_time": _summarize(self._processing_times),
+        }
+
+    async def combined_stats(self) -> dict:
+        """Stats summed over every worker process that published them recently, this one included."""
+        others = [
+            await shared_cache.get(key) for key in await shared_cache.keys("job_stats:")
+            if key != f"job_stats:{self._process_id}"
+        ]
+        return _combine([self.stats(), *(stats for stats in others if stats is not None)])
+
+    async def _publish_stats(self) -> None:
+        while True:
+            try:
+                await shared_cache.set(f"job_stats:{self._process_id}", self.stats(), ttl=_STATS_TTL)
+            except Exception as e:
+                log.error("Could not publish job queue stats: %s", e)
+            await asyncio.sleep(_STATS_INTERVAL)
+
+    async def _save(self, job: dict) -> None:
+        await shared_cache.set(f"job:{job['id']}", job, ttl=self._retention)
+
+    async def _update(self, job: dict) -> None:
+        # A worker keeps processing even when the shared cache cannot record a job's progress
+        try:
+            await self._save(job)
+        except Exception as e:
+            log.error("Could not save job %s: %s", job["id"], e)
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job, enqueued_at = await self._queue.get()
+            job_id = job["id"]
+            try:
+                started = time.monotonic()
+                self._wait_times.append(started - enqueued_at)
+                pipeline_stage_seconds.observe(started - enqueued_at, stage="queue_wait")
+                trace_id_var.set(job["trace_id"])
+                job.update(status="running", started_at=time.time())
+                await self._update(job)
+                self._running += 1
+                try:
+                    job["result"] = await self._handler(job["message"])
+                    if self._succeeded(job["result"]):
+                        job["status"] = "done"
+                        self._counters["completed"] += 1
+                    else:
+                        log.error("Job %s failed in worker %s: %s", job_id, number, job["result"].get("message"))
+                        job["status"] = "failed"
+                        self._counters["failed"] += 1
+                except Exception as e:
+                    log.error("Job %s failed in worker %s: %s", job_id, number, e)
+                    job.update(status="failed", result={"message": f"Internal error processing task: {e}"})
+                    self._counters["failed"] += 1
+                finally:
+                    self._running -= 1
+                self._processing_times.append(time.monotonic() - started)
+                job["finished_at"] = time.time()
+                await self._update(job)
+            finally:
+                self._queue.task_done()
+
+
+def _summarize(samples: deque) -> dict:
+    if not samples:
+        return {"count": 0, "avg": 0.0, "max": 0.0}
+    return {"count": len(samples), "avg": sum(samples) / len(samples), "max": max(samples)}
+
+
+def _combine(all_stats: list[dict]) -> dict:
+    combined = {
+        key: sum(stats[key] for stats in all_stats)
+        for key in ("depth", "max_size", "workers", "running", "submitted", "completed", "failed", "rejected")
+    }
+    combined["processes"] = len(all_stats)
+    for key in ("wait_time", "processing_time"):
+        count = sum(stats[key]["count"] for stats in all_stats)
+        combined[key] = {
+            "count": count,
+            "avg": sum(stats[key]["avg"] * stats[key]["count"] for stats in all_stats) / count if count else 0.0,
+            "max": max(stats[key]["max"] for stats in all_stats),
+        }
+    return combined
+
+
+job_queue = JobQueue(
+    handle_teams_message, workers=JOB_WORKERS, max_size=JOB_QUEUE_SIZE, retention=JOB_RETENTION, succeeded=is_handled
+)
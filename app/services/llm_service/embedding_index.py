@@ -0,0 +1,135 @@
+import threading
+
+from app.config import EMBEDDING_INDEX_ENABLED, EMBEDDING_MODEL
+from app.logger.logger import log
+
+
+class EmbeddingIndex:
+    """In-memory cosine-similarity index over story and task subjects.
+
+    Entries are grouped by scope: ``"stories"`` for user stories and ``"tasks:<story_id>"``
+    for the sub-tasks of one story. Embeddings are normalized, so cosine similarity is a dot product.
+    """
+
+    def __init__(self, model_name: str, enabled: bool = True):
+        self.model_name = model_name
+        self.enabled = enabled
+        self._model = None
+        self._lock = threading.Lock()
+        self._scopes: dict[str, dict] = {}
+
+    def _load_model(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                log.warning("sentence-transformers is not installed. Embedding index disabled.")
+                self.enabled = False
+                return None
+            log.info("Loading embedding model '%s'", self.model_name)
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def _encode(self, texts: list[str]):
+        model = self._load_model()
+        if model is None:
+            return None
+        return model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+    def has_scope(self, scope: str) -> bool:
+        return scope in self._scopes
+
+    def build(self, scope: str, items: list[tuple[int, str]]) -> None:
+        """Replace the entries of a scope with the given (id, subject) pairs."""
+        if not self.enabled:
+            return
+        vectors = self._encode([subject for _, subject in items]) if items else None
+        if items and vectors is None:
+            return
+        with self._lock:
+            self._scopes[scope] = {
+                "ids": [item_id for item_id, _ in items],
+                "subjects": [subject for _, subject in items],
+                "positions": {item_id: i for i, (item_id, _) in enumerate(items)},
+                "vectors": vectors,
+            }
+        log.info("Built embedding index '%s' with %s entries", scope, len(items))
+
+    def upsert(self, scope: str, items: list[tuple[int, str]]) -> None:
+        """Add new entries to a scope, or re-embed entries whose subject changed."""
+        if not self.enabled or not items:
+            return
+        import numpy as np
+
+        with self._lock:
+            entry = self._scopes.get(scope)
+            positions = entry["positions"] if entry else {}
+            changed = [
+                (item_id, subject) for item_id, subject in items
+                if item_id not in positions or entry["subjects"][positions[item_id]] != subject
+            ]
+        if not changed:
+            return
+
+        vectors = self._encode([subject for _, subject in changed])
+        if vectors is None:
+            return
+        with self._lock:
+            entry = self._scopes.setdefault(scope, {"ids": [], "subjects": [], "positions": {}, "vectors": None})
+            positions = entry["positions"]
+            new_rows = []
+            for (item_id, subject), vector in zip(changed, vectors):
+                if item_id in positions:
+                    entry["subjects"][positions[item_id]] = subject
+                    entry["vectors"][positions[item_id]] = vector
+                else:
+                    positions[item_id] = len(entry["ids"])
+                    entry["ids"].append(item_id)
+                    entry["subjects"].append(subject)
+                    new_rows.append(vector)
+            if new_rows:
+                stacked = np.vstack(new_rows)
+                entry["vectors"] = stacked if entry["vectors"] is None else np.vstack([entry["vectors"], stacked])
+        log.debug("Indexed %s entries in embedding index '%s'", len(changed), scope)
+
+    def remove(self, scope: str, item_id: int) -> None:
+        import numpy as np
+
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if not entry or item_id not in entry["positions"]:
+                return
+            position = entry["positions"].pop(item_id)
+            del entry["ids"][position]
+            del entry["subjects"][position]
+            entry["vectors"] = np.delete(entry["vectors"], position, axis=0)
+            for later_id in entry["ids"][position:]:
+                entry["positions"][later_id] -= 1
+
+    def search(self, scope: str, text: str, top_k: int, restrict_to: set[int] | None = None) -> list[tuple[int, str, float]]:
+        """Return up to ``top_k`` (id, subject, score) tuples ordered by descending cosine similarity."""
+        if not self.enabled:
+            return []
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if not entry or entry["vectors"] is None:
+                return []
+            ids, subjects, vectors = list(entry["ids"]), list(entry["subjects"]), entry["vectors"]
+
+        query = self._encode([text])
+        if query is None:
+            return []
+        import numpy as np
+
+        scores = vectors @ query[0]
+        results = []
+        for i in np.argsort(-scores):
+            if restrict_to is not None and ids[i] not in restrict_to:
+                continue
+            results.append((ids[i], subjects[i], float(scores[i])))
+            if len(results) == top_k:
+                break
+        return results
+
+
+embedding_index = EmbeddingIndex(EMBEDDING_MODEL, enabled=EMBEDDING_INDEX_ENABLED)
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_PATH
+from app.logger.logger import log
+from app.utils.utils import create_folder
+
+
+class LLMCache:
+    """Content-addressed cache for LLM answers with LRU/TTL eviction and an optional SQLite backend."""
+
+    def __init__(self, max_entries: int, ttl: float, path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+        self._conn = None
+        if enabled and path:
+            create_folder(file_path=path)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(template: str, model: str, **inputs) -> str:
+        payload = json.dumps({"template": template, "model": model, "inputs": inputs}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0], row[1])
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.time() + self._ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._conn.commit()
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """``get`` for coroutines: the SQLite lookup of a persistent cache runs in a worker thread."""
+        if self._conn is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: str) -> None:
+        if self._conn is None:
+            return self.set(key, value)
+        await asyncio.to_thread(self.set, key, value)
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+        log.info("Cleared LLM response cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "persistent": self._conn is not None,
+            }
+
+
+llm_cache = LLMCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_PATH or None, enabled=LLM_CACHE_ENABLED)
@@ -1,49 +1,160 @@
+import asyncio
+import json
+import re
 from typing import List, Optional
 
 from app.api_clients.llm_client import call_llm
+from app.config import (
+    DEDUP_TOP_K, DEDUP_DUPLICATE_THRESHOLD, DEDUP_CANDIDATE_THRESHOLD, OLLAMA_MODEL, LLM_STREAM_SHORT_ANSWERS,
+    TEXT_MATCH_MIN_LENGTH
+)
 from app.logger.logger import log
-
-
-def enrich_task_description(title: str) -> str:
+from app.services.llm_service.embedding_index import embedding_index
+from app.services.llm_service.llm_cache import llm_cache
+from app.services.llm_service.text_index import text_index, TextIndex, normalize_text
+
+# Cached answers are keyed by the template text, so editing a prompt stops serving answers to the old one
+_ENRICH_PROMPT = (
+    "You are a project assistant. Based on the following task title, "
+    "write a clear, concise task description in 2-3 sentences.\n"
+    "Task title: {title}\n\n"
+    "Reply with only the description, without any introduction or formatting."
+)
+_PRIORITY_PROMPT = (
+    "You're a project assistant. Based on the task below, decide the best priority.\n\n"
+    "Task: {task_text}\n"
+    "Available Priorities: {priorities}\n\n"
+    "Reply only with the exact priority name."
+)
+
+async def enrich_task_description(title: str) -> str:
     """Generate a concise enriched description for a task title using LLM."""
-    prompt = (
-        "You are a project assistant. Based on the following task title, "
-        "write a clear, concise task description in 2-3 sentences.\n"
-        f"Task title: {title}\n\n"
-        f"Reply with only the description, without any introduction or formatting."
-    )
-    return call_llm(prompt)
+    cache_key = llm_cache.make_key(_ENRICH_PROMPT, OLLAMA_MODEL, title=title)
+    cached = await llm_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
 
-def choose_priority(task_text: str, priorities: List[dict]) -> Optional[str]:
+    description = await call_llm(_ENRICH_PROMPT.format(title=title))
+    if description:
+        await llm_cache.set_async(cache_key, description)
+    return description
+
+async def choose_priority(task_text: str, priorities: List[dict]) -> Optional[str]:
     """Let LLM choose the most relevant priority from list based on task."""
     names = [p["name"] for p in priorities]
-    prompt = (
-        "You're a project assistant. Based on the task below, decide the best priority.\n\n"
-        f"Task: {task_text}\n"
-        f"Available Priorities: {', '.join(names)}\n\n"
-        "Reply only with the exact priority name."
-    )
+    cache_key = llm_cache.make_key(_PRIORITY_PROMPT, OLLAMA_MODEL, task_text=task_text, priorities=names)
+    cached = await llm_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
+
+    prompt = _PRIORITY_PROMPT.format(task_text=task_text, priorities=", ".join(names))
 
     try:
-        result = call_llm(prompt)
-        return result if result in names else None
+        result = await call_llm(prompt, stop_when=_priority_complete(names) if LLM_STREAM_SHORT_ANSWERS else None)
+        if result not in names:
+            return None
+        await llm_cache.set_async(cache_key, result)
+        return result
     except Exception as e:
-        log.error(f"LLM failed to choose priority: {e}")
+        log.error("LLM failed to choose priority: %s", e)
         return None
 
-def classify_prompt(message: str, existing_stories: list[tuple[str, str]]) -> str:
-    normalized_message = message.strip().lower()
-
-    for story_id, story_text in existing_stories:
-        normalized_story = story_text.strip().lower()
-        if normalized_message == normalized_story:
-            return f"D{story_id}"  # Exact match
-        elif normalized_message in normalized_story or normalized_story in normalized_message:
-            return f"S{story_id}"  # Partial string match
-
-    return ask_ollama_for_similarity(message, existing_stories)
+def _priority_complete(names: List[str]):
+    """Stop streaming once the answer is a priority name that no longer name extends."""
+    def complete(text: str) -> bool:
+        return "\n" in text or (text in names and not any(n != text and n.startswith(text) for n in names))
+    return complete
+
+def _verdict_complete(story_ids: set[str]):
+    """Stop streaming once the answer is None or a D<id>/S<id> whose id cannot grow into another known id."""
+    def complete(text: str) -> bool:
+        if "\n" in text or text.lower() == "none":
+            return True
+        match = re.fullmatch(r"[DS](\d+)", text, re.IGNORECASE)
+        return bool(match) and match.group(1) in story_ids and not any(
+            other != match.group(1) and other.startswith(match.group(1)) for other in story_ids
+        )
+    return complete
+
+def text_candidates(
+        message: str, scope: str = "stories", restrict_to: Optional[set[int]] = None, index: TextIndex = text_index
+) -> list:
+    """Return the best (id, subject, ratio, score) matches in ``scope``, optionally among ``restrict_to`` ids only.
+
+    The indexes are kept current by the store sync, our own creates and webhooks, so a search never lists the backlog.
+    """
+    return index.search(scope, message, DEDUP_TOP_K, restrict_to)
+
+def text_verdict(message: str, matches: list) -> Optional[str]:
+    """D<id> for an exact match, S<id> when one text contains the other, None otherwise.
+
+    Fuzzy scores only rank the candidates: two subjects that differ by one word can score high and still
+    mean different things, so anything short of containment is left to the embedding index and the LLM.
+    """
+    normalized = normalize_text(message)
+    subjects = [(story_id, normalize_text(subject)) for story_id, subject, _, _ in matches]
+    for story_id, subject in subjects:
+        if subject == normalized:
+            return f"D{story_id}"
+    for story_id, subject in subjects:
+        if min(len(subject), len(normalized)) >= TEXT_MATCH_MIN_LENGTH and _contains(subject, normalized):
+            return f"S{story_id}"
+    return None
+
+def _contains(a: str, b: str) -> bool:
+    """True when one text is a substring of the other, or all of its words appear in the other."""
+    words_a, words_b = set(a.split()), set(b.split())
+    return a in b or b in a or words_a <= words_b or words_b <= words_a
+
+def find_text_match(message: str, scope: str = "stories", index: TextIndex = text_index) -> Optional[str]:
+    """Cheap indexed text check that runs before any embedding or LLM work."""
+    return text_verdict(message, text_candidates(message, scope, index=index))
+
+async def classify_prompt(message: str, scope: str = "stories", restrict_to: Optional[set[int]] = None) -> str:
+    matches = text_candidates(message, scope, restrict_to)
+    match = text_verdict(message, matches)
+    if match:
+        log.debug("Text match for '%s': %s", message, matches[0])
+        return match
+
+    candidates = await shortlist_candidates(message, scope, restrict_to, matches)
+    if not candidates:
+        return None
 
-def ask_ollama_for_similarity(message, existing_stories):
+    duplicate = confident_duplicate(candidates)
+    if duplicate:
+        return duplicate
+
+    return await ask_ollama_for_similarity(message, [(story_id, subject) for story_id, subject, _ in candidates])
+
+async def shortlist_candidates(
+        message: str, scope: str = "stories", restrict_to: Optional[set[int]] = None, text_matches: Optional[list] = None
+) -> list:
+    """Return (id, subject, score) candidates for the LLM to judge.
+
+    With the embedding index these are the nearest stories above ``DEDUP_CANDIDATE_THRESHOLD``;
+    without it they are the text index matches, which share words or trigrams with the message,
+    and the score is None. No candidates means the message is new without asking the LLM.
+    """
+    if embedding_index.enabled and embedding_index.has_scope(scope):
+        candidates = await asyncio.to_thread(embedding_index.search, scope, message, DEDUP_TOP_K, restrict_to)
+        if embedding_index.enabled:
+            candidates = [c for c in candidates if c[2] >= DEDUP_CANDIDATE_THRESHOLD]
+            log.debug("Embedding candidates for '%s': %s", message, candidates)
+            return candidates
+
+    if text_matches is None:
+        text_matches = text_candidates(message, scope, restrict_to)
+    return [(story_id, subject, None) for story_id, subject, _, _ in text_matches]
+
+def confident_duplicate(candidates: list) -> Optional[str]:
+    """D<id> when the best candidate is similar enough to skip asking the LLM."""
+    story_id, _, score = candidates[0]
+    if score is not None and score >= DEDUP_DUPLICATE_THRESHOLD:
+        return f"D{story_id}"
+    return None
+
+async def ask_ollama_for_similarity(message, existing_stories):
     if not existing_stories:
         return None
 
@@ -58,23 +169,67 @@ def ask_ollama_for_similarity(message, existing_stories):
     )
 
     try:
-        result = call_llm(prompt).strip()
-        log.debug(f"Raw LLM duplicate check result: '{result}'")
+        stop_when = _verdict_complete({str(story[0]) for story in existing_stories}) if LLM_STREAM_SHORT_ANSWERS else None
+        result = (await call_llm(prompt, stop_when=stop_when)).strip()
+        log.debug("Raw LLM duplicate check result: '%s'", result)
 
         if result.lower() == "none":
             return None
 
-        # Normalize and check for match in existing_tasks
-        for original in existing_stories:
-            if result.lower() == original.lower():
-                # Return original for consistent casing
-                return original
+        # Accept only D<id>/S<id> verdicts that point at one of the stories we sent
+        match = re.fullmatch(r"([DS])(\d+)", result, re.IGNORECASE)
+        if match and any(str(story[0]) == match.group(2) for story in existing_stories):
+            return f"{match.group(1).upper()}{match.group(2)}"
+
+        log.warning("LLM response '%s' not found in existing tasks.", result)
+        return None
 
-        log.warning(f"LLM response '{result}' not found in existing tasks.")
+    except Exception as e:
+        log.error("Error during LLM duplicate check: %s", e)
         return None
 
+
+
+async def analyze_message(message: str, candidates: list[tuple[str, str]], priorities: List[dict]) -> Optional[dict]:
+    """Ask for the dedup verdict, description and priority in one structured LLM response.
+
+    Returns None when the answer is not valid JSON or refers to unknown stories or priorities,
+    so the caller can fall back to the per-function path.
+    """
+    names = [p["name"] for p in priorities]
+    prompt = (
+        "You are a project assistant. Analyse the new message against the existing stories and reply with a JSON object "
+        "with exactly these keys:"
+        '\n- "verdict": "D<story_id>" if the message is an exact match of an existing story, '
+        '"S<story_id>" if it is similar (but not exactly the same), or "None" if there is no match.'
+        '\n- "description": a clear, concise task description in 2-3 sentences.'
+        f'\n- "priority": the best priority, exactly one of: {", ".join(names)}.'
+        f"\n\nNew message: {message}\n"
+        "Existing Stories:\n" + ("\n".join(f"{story[0]} - {story[1]}" for story in candidates) or "(none)")
+    )
+
+    try:
+        raw = await call_llm(prompt, response_format="json")
+        log.debug("Raw LLM single-shot result: '%s'", raw)
+        result = json.loads(raw)
     except Exception as e:
-        log.error(f"Error during LLM duplicate check: {e}")
+        log.error("Error during single-shot LLM analysis: %s", e)
         return None
 
+    verdict = str(result.get("verdict", "")).strip()
+    description = result.get("description")
+    priority = result.get("priority")
+    if verdict.lower() in ("none", "null", ""):
+        verdict = None
+    else:
+        match = re.fullmatch(r"([DS])(\d+)", verdict, re.IGNORECASE)
+        if not match or not any(str(story[0]) == match.group(2) for story in candidates):
+            log.warning("Single-shot verdict '%s' not found in candidate stories.", verdict)
+            return None
+        verdict = f"{match.group(1).upper()}{match.group(2)}"
+
+    if not isinstance(description, str) or not description.strip() or priority not in names:
+        log.warning("Single-shot answer has an invalid description or priority: %s", result)
+        return None
 
+    return {"verdict": verdict, "description": description.strip(), "priority": priority}
@@ -0,0 +1,176 @@
+import re
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+
+from app.config import TEXT_MATCH_MIN_LENGTH
+from app.logger.logger import log
+
+try:
+    from fuzzywuzzy import fuzz
+except ImportError:
+    fuzz = None
+    log.warning("fuzzywuzzy is not installed. Text index falls back to difflib ratios.")
+
+_STOPWORDS = {"a", "an", "and", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or", "the", "to", "with"}
+
+# Postings that cover more than this share of a scope are too common to narrow anything down
+_COMMON_POSTING_SHARE = 0.05
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def _tokens(normalized: str) -> set[str]:
+    return {token for token in normalized.split() if token not in _STOPWORDS}
+
+
+def _ngrams(normalized: str, n: int = 3) -> set[str]:
+    padded = f" {normalized} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def ratio(a: str, b: str) -> float:
+    if fuzz is not None:
+        return float(fuzz.ratio(a, b))
+    return round(100 * SequenceMatcher(None, a, b).ratio(), 1)
+
+
+def token_set_ratio(a: str, b: str) -> float:
+    """Similarity that ignores word order and words only one side has; 100 when one is a subset of the other."""
+    if fuzz is not None:
+        return float(fuzz.token_set_ratio(a, b))
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    common = " ".join(sorted(tokens_a & tokens_b))
+    with_a = f"{common} {' '.join(sorted(tokens_a - tokens_b))}".strip()
+    with_b = f"{common} {' '.join(sorted(tokens_b - tokens_a))}".strip()
+    return max(ratio(common, with_a), ratio(common, with_b), ratio(with_a, with_b)) if common else ratio(with_a, with_b)
+
+
+class TextIndex:
+    """Normalized-subject index over story and task subjects, using the same scopes as the embedding index.
+
+    Exact matches come from a hash map of normalized subjects. Other candidates are retrieved through token
+    and character-trigram inverted indexes and ranked by fuzzy ratio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes: dict[str, dict] = {}
+
+    def has_scope(self, scope: str) -> bool:
+        return scope in self._scopes
+
+    def build(self, scope: str, items: list[tuple[int, str]]) -> None:
+        """Replace the entries of a scope with the given (id, subject) pairs."""
+        with self._lock:
+            self._scopes[scope] = {"subjects": {}, "normalized": {}, "exact": {}, "tokens": {}, "ngrams": {}}
+            self._add(self._scopes[scope], items)
+        log.debug("Built text index '%s' with %s entries", scope, len(items))
+
+    def upsert(self, scope: str, items: list[tuple[int, str]]) -> None:
+        """Add new entries to a scope, or re-index entries whose subject changed."""
+        with self._lock:
+            entry = self._scopes.setdefault(
+                scope, {"subjects": {}, "normalized": {}, "exact": {}, "tokens": {}, "ngrams": {}}
+            )
+            changed = [(item_id, subject) for item_id, subject in items if entry["subjects"].get(item_id) != subject]
+            if not changed:
+                return
+            for item_id, _ in changed:
+                self._discard(entry, item_id)
+            self._add(entry, changed)
+
+    def remove(self, scope: str, item_id: int) -> None:
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry:
+                self._discard(entry, item_id)
+
+    def search(
+            self, scope: str, text: str, limit: int, restrict_to: set[int] | None = None
+    ) -> list[tuple[int, str, float, float]]:
+        """Return up to ``limit`` (id, subject, ratio, score) tuples, best first.
+
+        ``ratio`` compares the whole normalized strings. ``score`` also credits shared words in any order,
+        but only when both sides are at least ``TEXT_MATCH_MIN_LENGTH`` characters long, so a short message
+        does not match every subject that contains it.
+        """
+        normalized = normalize_text(text)
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if not entry or not normalized:
+                return []
+
+            exact = [i for i in entry["exact"].get(normalized, ()) if restrict_to is None or i in restrict_to]
+            if exact:
+                return [(i, entry["subjects"][i], 100.0, 100.0) for i in exact[:limit]]
+
+            candidates = self._candidates(entry, normalized, limit, restrict_to)
+            results = []
+            for item_id in candidates:
+                subject_normalized = entry["normalized"][item_id]
+                full = ratio(normalized, subject_normalized)
+                score = full
+                if min(len(normalized), len(subject_normalized)) >= TEXT_MATCH_MIN_LENGTH:
+                    score = max(full, token_set_ratio(normalized, subject_normalized))
+                results.append((item_id, entry["subjects"][item_id], full, score))
+        results.sort(key=lambda result: (result[3], result[2]), reverse=True)
+        return results[:limit]
+
+    def _candidates(self, entry: dict, normalized: str, limit: int, restrict_to: set[int] | None) -> list[int]:
+        size = len(entry["subjects"])
+        common = max(_COMMON_POSTING_SHARE * size, 20)
+        tokens = _tokens(normalized)
+        counts: Counter = Counter()
+        for token in tokens:
+            postings = entry["tokens"].get(token, ())
+            if len(postings) <= common:
+                # Rare words weigh more than words many subjects share
+                for item_id in postings:
+                    counts[item_id] += 1 + 1 / len(postings)
+        if not counts:
+            # Only common words: fall back to their postings rather than find nothing
+            for token in tokens:
+                for item_id in entry["tokens"].get(token, ()):
+                    counts[item_id] += 1
+        if len(counts) < limit:
+            for gram in _ngrams(normalized):
+                postings = entry["ngrams"].get(gram, ())
+                if len(postings) <= common:
+                    for item_id in postings:
+                        counts[item_id] += 0.1
+        if restrict_to is not None:
+            counts = Counter({item_id: count for item_id, count in counts.items() if item_id in restrict_to})
+        # Rank more than needed; the fuzzy ratio decides the final order
+        return [item_id for item_id, _ in counts.most_common(limit * 4)]
+
+    @staticmethod
+    def _add(entry: dict, items: list[tuple[int, str]]) -> None:
+        for item_id, subject in items:
+            normalized = normalize_text(subject)
+            entry["subjects"][item_id] = subject
+            entry["normalized"][item_id] = normalized
+            entry["exact"].setdefault(normalized, []).append(item_id)
+            for token in _tokens(normalized):
+                entry["tokens"].setdefault(token, set()).add(item_id)
+            for gram in _ngrams(normalized):
+                entry["ngrams"].setdefault(gram, set()).add(item_id)
+
+    @staticmethod
+    def _discard(entry: dict, item_id: int) -> None:
+        if item_id not in entry["subjects"]:
+            return
+        normalized = entry["normalized"].pop(item_id)
+        del entry["subjects"][item_id]
+        entry["exact"][normalized].remove(item_id)
+        if not entry["exact"][normalized]:
+            del entry["exact"][normalized]
+        for token in _tokens(normalized):
+            entry["tokens"][token].discard(item_id)
+        for gram in _ngrams(normalized):
+            entry["ngrams"][gram].discard(item_id)
+
+
+text_index = TextIndex()
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.logger.logger import log
+
+
+class Startup:
+    """Tracks how long the app took to import and warm up, and whether it is ready for traffic.
+
+    Warm-up stages run in the background after the server starts accepting connections. A failed stage is
+    logged and recorded but does not hold readiness back; whatever it would have loaded is fetched on first use.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.timings: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.timings[stage] = round(seconds, 3)
+        log.info("Startup stage '%s' took %.3fs", stage, seconds)
+
+    def start_warm_up(self, stages: list[tuple[str, Callable[[], Awaitable]]]) -> None:
+        self.ready = False
+        self._task = asyncio.create_task(self._warm_up(stages))
+
+    async def _warm_up(self, stages: list[tuple[str, Callable[[], Awaitable]]]) -> None:
+        started = time.perf_counter()
+        for stage, func in stages:
+            stage_started = time.perf_counter()
+            try:
+                await func()
+            except Exception as e:
+                log.error("Warm-up stage '%s' failed: %s", stage, e)
+                self.errors[stage] = str(e)
+            self.record(stage, time.perf_counter() - stage_started)
+        self.record("warm_up", time.perf_counter() - started)
+        self.ready = True
+
+    async def wait_ready(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime": round(time.time() - self.started_at, 3),
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+
+startup = Startup()
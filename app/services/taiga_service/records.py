@@ -0,0 +1,47 @@
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True)
+class StoryRecord:
+    """The fields of a Taiga user story the service reads; the full object is fetched on demand."""
+
+    id: int
+    subject: str
+    status: Optional[int] = None
+    priority: Optional[int] = None
+    version: Optional[int] = None
+    modified_date: Optional[str] = None
+
+    @classmethod
+    def from_api(cls, story: dict) -> "StoryRecord":
+        return cls(
+            story["id"], story["subject"], story.get("status"), story.get("priority"), story.get("version"),
+            story.get("modified_date"),
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class TaskRecord:
+    """The fields of a Taiga task the service reads; the full object is fetched on demand."""
+
+    id: int
+    subject: str
+    user_story: Optional[int] = None
+    status: Optional[int] = None
+    priority: Optional[int] = None
+    version: Optional[int] = None
+    modified_date: Optional[str] = None
+
+    @classmethod
+    def from_api(cls, task: dict) -> "TaskRecord":
+        return cls(
+            task["id"], task["subject"], task.get("user_story"), task.get("status"), task.get("priority"),
+            task.get("version"), task.get("modified_date"),
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
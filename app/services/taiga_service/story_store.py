@@ -0,0 +1,140 @@
+import json
+import sqlite3
+import threading
+from typing import Iterator, Optional
+
+from app.config import STORY_STORE_PATH
+from app.logger.logger import log
+from app.services.taiga_service.records import StoryRecord, TaskRecord
+from app.utils.utils import create_folder
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_stories (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    modified_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    user_story INTEGER,
+    subject TEXT NOT NULL,
+    modified_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_story ON tasks (user_story);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class StoryStore:
+    """Local SQLite mirror of the project's user stories and tasks.
+
+    Only the fields in ``StoryRecord`` and ``TaskRecord`` are kept; the rest of Taiga's payload is dropped on write.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            create_folder(file_path=path)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def upsert_stories(self, stories: list[dict]) -> None:
+        with self._lock, self._conn:
+            self._insert_stories(stories)
+
+    def _insert_stories(self, stories: list[dict]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO user_stories (id, subject, modified_date, data) VALUES (?, ?, ?, ?)",
+            [
+                (s["id"], s["subject"], s.get("modified_date"), json.dumps(StoryRecord.from_api(s).as_dict()))
+                for s in stories
+            ],
+        )
+
+    def upsert_tasks(self, tasks: list[dict]) -> None:
+        with self._lock, self._conn:
+            self._insert_tasks(tasks)
+
+    def _insert_tasks(self, tasks: list[dict]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO tasks (id, user_story, subject, modified_date, data) VALUES (?, ?, ?, ?, ?)",
+            [
+                (t["id"], t.get("user_story"), t["subject"], t.get("modified_date"), json.dumps(TaskRecord.from_api(t).as_dict()))
+                for t in tasks
+            ],
+        )
+
+    def prune(self, table: str, keep_ids: set[int]) -> list[int]:
+        """Delete every row of ``table`` whose id is not in ``keep_ids`` and return their ids; used after a full reload."""
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id INTEGER PRIMARY KEY)")
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.executemany("INSERT INTO keep_ids (id) VALUES (?)", [(i,) for i in keep_ids])
+            deleted = [
+                row[0] for row in self._conn.execute(f"SELECT id FROM {table} WHERE id NOT IN (SELECT id FROM keep_ids)")
+            ]
+            self._conn.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT id FROM keep_ids)")
+            self._conn.execute("DELETE FROM keep_ids")
+        return deleted
+
+    def delete_story(self, story_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM user_stories WHERE id = ?", (story_id,))
+            self._conn.execute("DELETE FROM tasks WHERE user_story = ?", (story_id,))
+
+    def delete_task(self, task_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def iter_stories(self, fields: Optional[list[str]] = None, batch_size: int = 500) -> Iterator[dict]:
+        """Yield stories in id order, reading ``batch_size`` rows at a time and projecting to ``fields``."""
+        # Fields that live in their own column are read without decoding the JSON payload
+        from_columns = bool(fields) and set(fields) <= {"id", "subject", "modified_date"}
+        select = "id, " + ", ".join(fields) if from_columns else "id, data"
+        last_id = -1
+        while True:
+            rows = self._fetch(
+                f"SELECT {select} FROM user_stories WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            )
+            if not rows:
+                return
+            for row in rows:
+                last_id = row[0]
+                if from_columns:
+                    yield dict(zip(fields, row[1:]))
+                else:
+                    story = StoryRecord.from_api(json.loads(row[1])).as_dict()
+                    yield {field: story.get(field) for field in fields} if fields else story
+
+    def get_story(self, story_id: int) -> Optional[StoryRecord]:
+        rows = self._fetch("SELECT data FROM user_stories WHERE id = ?", (story_id,))
+        return StoryRecord.from_api(json.loads(rows[0][0])) if rows else None
+
+    def list_task_subjects(self, story_id: int) -> list[tuple[int, str]]:
+        return self._fetch("SELECT id, subject FROM tasks WHERE user_story = ? ORDER BY id", (story_id,))
+
+    def get_task(self, task_id: int) -> Optional[TaskRecord]:
+        rows = self._fetch("SELECT data FROM tasks WHERE id = ?", (task_id,))
+        return TaskRecord.from_api(json.loads(rows[0][0])) if rows else None
+
+    def get_state(self, key: str) -> Optional[str]:
+        rows = self._fetch("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_state(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def _fetch(self, query: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+
+story_store = StoryStore(STORY_STORE_PATH)
+log.debug("Story store opened at %s", STORY_STORE_PATH)
@@ -1,18 +1,105 @@
-import requests
-from app.config import TAIGA_API_URL, TAIGA_USERNAME, TAIGA_PASSWORD
+import asyncio
+import base64
+import json
+import time
+
+import httpx
+
+from app.config import TAIGA_USERNAME, TAIGA_PASSWORD, TAIGA_TOKEN_TTL, TAIGA_TOKEN_REFRESH_MARGIN
 from app.logger.logger import log
+from app.services.cache_service.shared_cache import shared_cache
+
+_SHARED_TOKEN_KEY = "taiga_token"
+_SHARED_AUTH_LOCK = "taiga_auth"
+_SHARED_AUTH_LOCK_TTL = 30
+
+# Local copy of the shared token, so most requests skip the shared cache lookup
+_token_cache = {"token": None, "refresh": None, "expires_at": 0.0}
+_auth_lock: asyncio.Lock | None = None
+
+
+def _get_auth_lock() -> asyncio.Lock:
+    global _auth_lock
+    if _auth_lock is None:
+        _auth_lock = asyncio.Lock()
+    return _auth_lock
+
+
+def _token_expiry(token: str) -> float:
+    """Read the ``exp`` claim of a JWT auth token, falling back to TAIGA_TOKEN_TTL from now."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, ValueError, TypeError):
+        return time.time() + TAIGA_TOKEN_TTL
+
+
+def _usable_token(stale_token: str | None) -> str | None:
+    token = _token_cache["token"]
+    if token and token != stale_token and _token_cache["expires_at"] - TAIGA_TOKEN_REFRESH_MARGIN > time.time():
+        return token
+    return None
 
-_token_cache = {"token": None}
 
-def get_taiga_token():
-    if _token_cache["token"]:
+async def _store_tokens(data: dict) -> str:
+    token = data["auth_token"]
+    _token_cache.update(token=token, refresh=data.get("refresh"), expires_at=_token_expiry(token))
+    await shared_cache.set(_SHARED_TOKEN_KEY, _token_cache, ttl=max(_token_cache["expires_at"] - time.time(), 1))
+    return token
+
+
+async def get_taiga_token(client: httpx.AsyncClient, stale_token: str | None = None):
+    """Return a valid auth token, refreshing it shortly before expiry.
+
+    ``stale_token`` is the token a request was just rejected with; it is never handed out again.
+    Concurrent callers share a single in-flight login or refresh, across workers with a shared cache backend.
+    """
+    token = _usable_token(stale_token)
+    if token:
         log.debug("Using cached Taiga token")
-        return _token_cache["token"]
+        return token
+
+    async with _get_auth_lock():
+        # Another caller may have refreshed the token while we were waiting for the lock
+        token = _usable_token(stale_token)
+        if token:
+            return token
+
+        lock = await shared_cache.acquire_lock(_SHARED_AUTH_LOCK, _SHARED_AUTH_LOCK_TTL, timeout=_SHARED_AUTH_LOCK_TTL)
+        try:
+            # Another worker may have logged in already
+            _token_cache.update(await shared_cache.get(_SHARED_TOKEN_KEY) or {})
+            token = _usable_token(stale_token)
+            if token:
+                return token
+
+            if _token_cache["refresh"]:
+                try:
+                    return await _refresh_token(client)
+                except (httpx.HTTPError, KeyError) as e:
+                    log.warning("Taiga token refresh failed, logging in again: %s", e)
+
+            return await _login(client)
+        finally:
+            if lock:
+                await shared_cache.release_lock(_SHARED_AUTH_LOCK, lock)
+
+
+async def _refresh_token(client: httpx.AsyncClient) -> str:
+    log.info("Refreshing Taiga auth token...")
+    response = await client.post("/auth/refresh", json={"refresh": _token_cache["refresh"]})
+    response.raise_for_status()
+    token = await _store_tokens(response.json())
+    log.info("Taiga auth token refreshed successfully")
+    return token
+
 
+async def _login(client: httpx.AsyncClient) -> str:
     try:
         log.info("Requesting new Taiga auth token...")
-        response = requests.post(
-            f"{TAIGA_API_URL}/auth",
+        response = await client.post(
+            "/auth",
             json={
                 "type": "normal",
                 "username": TAIGA_USERNAME,
@@ -20,11 +107,10 @@ def get_taiga_token():
             }
         )
         response.raise_for_status()
-        token = response.json()["auth_token"]
-        _token_cache["token"] = token
+        token = await _store_tokens(response.json())
         log.info("Taiga auth token acquired successfully")
         return token
 
-    except requests.exceptions.RequestException as e:
-        log.error(f"Failed to authenticate with Taiga: {e}")
+    except httpx.HTTPError as e:
+        log.error("Failed to authenticate with Taiga: %s", e)
         raise RuntimeError("Unable to authenticate with Taiga API")
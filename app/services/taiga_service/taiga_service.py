@@ -1,95 +1,332 @@
-from typing import List
+import asyncio
+import time
+from typing import List, Callable, Any, Awaitable, AsyncIterator, Iterator, Optional
+
 from app.api_clients.taiga_client import (
-    get_project_by_slug, get_user_stories, get_userstory_statuses,
-    get_priorities, create_user_story, get_tasks_for_story,
-    create_userstory_task, get_task_statuses
+    get_project_by_slug, iter_user_stories, get_userstory_statuses,
+    get_priorities, get_tasks_for_story, get_task_statuses, iter_tasks, get_user_story_by_id, get_task_by_id
+)
+from app.config import (
+    TAIGA_PROJECT_SLUG, TAIGA_METADATA_CACHE_TTL, TAIGA_PAGE_SIZE, STORY_STORE_SYNC_INTERVAL, STORY_STORE_FULL_SYNC_INTERVAL,
+    TAIGA_WEBHOOK_SECRET
 )
-from app.config import TAIGA_PROJECT_SLUG
 from app.logger.logger import log
+from app.services.cache_service.shared_cache import shared_cache
+from app.services.llm_service.embedding_index import embedding_index
+from app.services.llm_service.text_index import text_index
+from app.services.taiga_service.story_store import story_store
+from app.services.taiga_service.write_batcher import write_batcher
+
+_metadata_cache_stats = {"hits": 0, "misses": 0}
+
+_store_sync_lock = asyncio.Lock()
+_store_sync_state = {"last_sync": None, "last_full_sync": None}
+# Set once the mirror has been fully loaded; readers wait for that, never for a later sync
+_store_loaded = asyncio.Event()
+_store_sync_task: Optional[asyncio.Task] = None
+
+
+async def _get_cached_metadata(key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Return a cached metadata value, loading it from Taiga once the TTL has expired."""
+    value = await shared_cache.get(f"metadata:{key}")
+    if value is not None:
+        _metadata_cache_stats["hits"] += 1
+        return value
+
+    _metadata_cache_stats["misses"] += 1
+    value = await loader()
+    await shared_cache.set(f"metadata:{key}", value, ttl=TAIGA_METADATA_CACHE_TTL)
+    log.debug("Cached Taiga metadata '%s' for %ss", key, TAIGA_METADATA_CACHE_TTL)
+    return value
+
+
+async def invalidate_metadata_cache(key: str | None = None) -> None:
+    """Drop one cached metadata entry, or all of them when no key is given."""
+    keys = [f"metadata:{key}"] if key is not None else await shared_cache.keys("metadata:")
+    for cache_key in keys:
+        await shared_cache.delete(cache_key)
+    log.info("Invalidated Taiga metadata cache: %s", key or 'all')
+
+
+async def peek_metadata_cache(key: str) -> Any:
+    """Return a cached metadata value without loading it, or None."""
+    return await shared_cache.get(f"metadata:{key}")
+
+
+def get_metadata_cache_stats() -> dict:
+    """Hit and miss counters of this worker."""
+    return dict(_metadata_cache_stats)
 
 
-def get_project_id() -> int:
+async def get_metadata_cache_entries() -> list[str]:
+    return [key[len("metadata:"):] for key in await shared_cache.keys("metadata:")]
+
+
+async def warm_up_metadata_cache() -> None:
+    """Preload project, statuses and priorities so the first message skips those round-trips."""
+    project_id = await get_project_id()
+    await asyncio.gather(
+        _get_cached_metadata(f"userstory_statuses:{project_id}", lambda: get_userstory_statuses(project_id)),
+        _get_cached_metadata(f"task_statuses:{project_id}", lambda: get_task_statuses(project_id)),
+        _get_cached_metadata(f"priorities:{project_id}", lambda: get_priorities(project_id)),
+    )
+    log.info("Taiga metadata cache warmed up for project %s", project_id)
+
+
+async def get_project_id() -> int:
     try:
-        project = get_project_by_slug(TAIGA_PROJECT_SLUG)
-        log.debug(f"Fetched project: {project['id']}")
+        project = await _get_cached_metadata(
+            f"project:{TAIGA_PROJECT_SLUG}", lambda: get_project_by_slug(TAIGA_PROJECT_SLUG)
+        )
+        log.debug("Fetched project: %s", project['id'])
         return project["id"]
     except Exception as e:
-        log.error(f"Error fetching project by slug: {e}")
+        log.error("Error fetching project by slug: %s", e)
         raise
 
 
-def get_all_user_stories() -> List[dict]:
+async def sync_story_store(full: bool = False) -> None:
+    """Refresh the local story/task mirror: a full reload, or only items modified since the last sync.
+
+    Runs on startup and then from the background task started by ``start_store_sync``, never on the message path.
+    With Taiga webhooks configured, the mirror is kept current by ``/taiga/webhook`` between full reloads.
+    Stories are indexed for dedup as they are written, so the indexes follow the mirror.
+    """
+    async with _store_sync_lock:
+        now = time.monotonic()
+        last_sync, last_full_sync = _store_sync_state["last_sync"], _store_sync_state["last_full_sync"]
+        if not full and last_sync is not None and now - last_sync < STORY_STORE_SYNC_INTERVAL:
+            return
+        full = full or last_full_sync is None or now - last_full_sync >= STORY_STORE_FULL_SYNC_INTERVAL
+        if TAIGA_WEBHOOK_SECRET and not full:
+            return
+
+        try:
+            project_id = await get_project_id()
+            if full:
+                stories, tasks = await asyncio.gather(
+                    _load_into_store(
+                        iter_user_stories(project_id), story_store.upsert_stories, "user_stories", "stories", True
+                    ),
+                    _load_into_store(iter_tasks(project_id), story_store.upsert_tasks, "tasks", full=True),
+                )
+                _store_sync_state["last_full_sync"] = now
+                _store_loaded.set()
+            else:
+                stories, tasks = await asyncio.gather(
+                    _load_into_store(
+                        iter_user_stories(project_id, await _sync_watermark("user_stories")),
+                        story_store.upsert_stories, "user_stories", "stories",
+                    ),
+                    _load_into_store(
+                        iter_tasks(project_id, await _sync_watermark("tasks")), story_store.upsert_tasks, "tasks"
+                    ),
+                )
+            _store_sync_state["last_sync"] = now
+            log.debug("Synced story store (%s): %s stories, %s tasks", 'full' if full else 'incremental', stories, tasks)
+        except Exception as e:
+            log.error("Error syncing story store: %s", e)
+            raise
+
+
+def start_store_sync() -> None:
+    """Start the background task that keeps the mirror current."""
+    global _store_sync_task
+    if _store_sync_task is None:
+        _store_sync_task = asyncio.create_task(_sync_store_periodically())
+
+
+async def stop_store_sync() -> None:
+    global _store_sync_task
+    if _store_sync_task is not None:
+        _store_sync_task.cancel()
+        await asyncio.gather(_store_sync_task, return_exceptions=True)
+        _store_sync_task = None
+
+
+async def _sync_store_periodically() -> None:
+    while True:
+        await asyncio.sleep(max(STORY_STORE_SYNC_INTERVAL, 1))
+        try:
+            await sync_story_store()
+        except Exception:
+            # Already logged; the next round retries, with a full reload if the first one never finished
+            pass
+
+
+async def wait_for_story_store() -> None:
+    """Wait for the first full load of the mirror and its story index; once it is done readers never wait again."""
+    if not _store_loaded.is_set():
+        await _store_loaded.wait()
+
+
+async def _sync_watermark(table: str) -> Optional[str]:
+    return await asyncio.to_thread(story_store.get_state, f"sync_watermark:{table}")
+
+
+async def _load_into_store(
+        items: AsyncIterator[dict], upsert, table: str, scope: Optional[str] = None, full: bool = False
+) -> int:
+    """Write items into the store page by page, index them in ``scope``, and advance the table's sync watermark.
+
+    The watermark is the newest ``modified_date`` a sync has returned, not the newest in the store: our own
+    creates and webhook updates are newer than changes other users made before them, which would be skipped.
+    A full load also drops rows Taiga no longer has.
+    """
+    seen, batch, latest = set(), [], None
+    async for item in items:
+        seen.add(item["id"])
+        batch.append(item)
+        if item.get("modified_date") and (latest is None or item["modified_date"] > latest):
+            latest = item["modified_date"]
+        if len(batch) >= TAIGA_PAGE_SIZE:
+            await _write_page(batch, upsert, scope)
+            batch = []
+    if batch:
+        await _write_page(batch, upsert, scope)
+    if full:
+        removed = await asyncio.to_thread(story_store.prune, table, seen)
+        if scope:
+            await unindex_subjects(scope, removed)
+    watermark = await _sync_watermark(table)
+    if latest and (full or watermark is None or latest > watermark):
+        await asyncio.to_thread(story_store.set_state, f"sync_watermark:{table}", latest)
+    return len(seen)
+
+
+async def _write_page(items: list[dict], upsert, scope: Optional[str]) -> None:
+    await asyncio.to_thread(upsert, items)
+    if scope:
+        await index_subjects(scope, [(item["id"], item["subject"]) for item in items])
+
+
+async def index_subjects(scope: str, items: list[tuple[int, str]]) -> None:
+    """Add or update (id, subject) entries in the text and embedding indexes."""
+    text_index.upsert(scope, items)
+    await asyncio.to_thread(embedding_index.upsert, scope, items)
+
+
+async def unindex_subjects(scope: str, item_ids: list[int]) -> None:
+    for item_id in item_ids:
+        text_index.remove(scope, item_id)
+    if item_ids:
+        await asyncio.to_thread(lambda: [embedding_index.remove(scope, item_id) for item_id in item_ids])
+
+
+async def iter_all_user_stories(fields: Optional[list[str]] = None) -> Iterator[dict]:
+    """Return a lazy iterator over the mirror's stories projected to ``fields``."""
+    await wait_for_story_store()
+    return story_store.iter_stories(fields)
+
+
+async def get_user_story_entry(story_id: int) -> dict:
+    """Fetch the full story from Taiga; the mirror only keeps its compact record."""
     try:
-        project_id = get_project_id()
-        stories = get_user_stories(project_id)
-        log.debug(f"Fetched {len(stories)} user stories")
-        return stories
+        story = await get_user_story_by_id(story_id)
+        await asyncio.to_thread(story_store.upsert_stories, [story])
+        return story
     except Exception as e:
-        log.error(f"Error fetching user stories: {e}")
+        log.error("Error fetching user story %s: %s", story_id, e)
         raise
 
 
-def get_all_sub_tasks(userstory_id: int) -> List[dict]:
+async def get_all_sub_tasks(userstory_id: int) -> List[dict]:
+    """Fetch the story's full tasks from Taiga; the mirror only keeps their compact records."""
     try:
-        tasks = get_tasks_for_story(userstory_id)
-        log.debug(f"Fetched {len(tasks)} tasks for story ID {userstory_id}")
+        tasks = await get_tasks_for_story(userstory_id)
+        await asyncio.to_thread(story_store.upsert_tasks, tasks)
+        log.debug("Fetched %s tasks for story ID %s", len(tasks), userstory_id)
         return tasks
     except Exception as e:
-        log.error(f"Error fetching tasks for user story {userstory_id}: {e}")
+        log.error("Error fetching tasks for user story %s: %s", userstory_id, e)
         raise
 
 
-def get_userstory_status(project_id: int) -> int:
+async def index_sub_tasks(userstory_id: int) -> set[int]:
+    """Index the story's sub-tasks from the mirror and return their ids, to restrict a search of its scope to.
+
+    A story has few tasks, so they are read on use; the ids leave out tasks since moved to another story.
+    """
+    await wait_for_story_store()
+    tasks = await asyncio.to_thread(story_store.list_task_subjects, userstory_id)
+    await index_subjects(f"tasks:{userstory_id}", tasks)
+    return {task_id for task_id, _ in tasks}
+
+
+async def get_sub_task_entry(task_id: int) -> dict:
+    """Fetch the full task from Taiga; the mirror only keeps its compact record."""
     try:
-        statuses = get_userstory_statuses(project_id)
+        task = await get_task_by_id(task_id)
+        await asyncio.to_thread(story_store.upsert_tasks, [task])
+        return task
+    except Exception as e:
+        log.error("Error fetching task %s: %s", task_id, e)
+        raise
+
+
+async def get_userstory_status(project_id: int) -> int:
+    try:
+        statuses = await _get_cached_metadata(
+            f"userstory_statuses:{project_id}", lambda: get_userstory_statuses(project_id)
+        )
         if not statuses:
             raise ValueError("No user story statuses found")
-        log.debug(f"Using status: {statuses[0]}")
+        log.debug("Using status: %s", statuses[0])
         return statuses[0]["id"]
     except Exception as e:
-        log.error(f"Error fetching user story statuses: {e}")
+        log.error("Error fetching user story statuses: %s", e)
         raise
 
 
-def get_task_status(project_id: int) -> int:
+async def get_task_status(project_id: int) -> int:
     try:
-        statuses = get_task_statuses(project_id)
+        statuses = await _get_cached_metadata(f"task_statuses:{project_id}", lambda: get_task_statuses(project_id))
         if not statuses:
             raise ValueError("No task statuses found")
-        log.debug(f"Using task status: {statuses[0]}")
+        log.debug("Using task status: %s", statuses[0])
         return statuses[0]["id"]
     except Exception as e:
-        log.error(f"Error fetching task statuses: {e}")
+        log.error("Error fetching task statuses: %s", e)
         raise
 
 
-def get_priority_id(title: str, project_id: int, choose_priority_func) -> int:
+async def get_project_priorities(project_id: int) -> List[dict]:
+    return await _get_cached_metadata(f"priorities:{project_id}", lambda: get_priorities(project_id))
+
+
+async def get_priority_id(title: str, project_id: int, choose_priority_func) -> int:
     try:
-        priorities = get_priorities(project_id)
-        selected = choose_priority_func(title, priorities)
+        priorities = await get_project_priorities(project_id)
+        selected = await choose_priority_func(title, priorities)
         match = next((p["id"] for p in priorities if p["name"].lower() == selected.lower()), None)
         if match is None:
             raise ValueError(f"No matching priority for '{selected}'")
-        log.debug(f"Selected priority: {selected} → ID: {match}")
+        log.debug("Selected priority: %s → ID: %s", selected, match)
         return match
     except Exception as e:
-        log.error(f"Error determining priority ID for title '{title}': {e}")
+        log.error("Error determining priority ID for title '%s': %s", title, e)
         raise
 
 
-def create_user_story_entry(payload: dict) -> dict:
+async def create_user_story_entry(payload: dict) -> dict:
     try:
-        log.debug(f"Creating user story with title: {payload['subject']}")
-        return create_user_story(payload)
+        log.debug("Creating user story with title: %s", payload['subject'])
+        story = await write_batcher.create_user_story(payload)
+        await asyncio.to_thread(story_store.upsert_stories, [story])
+        await index_subjects("stories", [(story["id"], story["subject"])])
+        return story
     except Exception as e:
-        log.error(f"Error creating user story: {e}")
+        log.error("Error creating user story: %s", e)
         raise
 
 
-def create_user_story_task(userstory_id: int, payload: dict) -> dict:
+async def create_user_story_task(userstory_id: int, payload: dict) -> dict:
     try:
-        log.debug(f"Creating sub-task in story {userstory_id} with title: {payload['subject']}")
-        return create_userstory_task(userstory_id, payload)
+        log.debug("Creating sub-task in story %s with title: %s", userstory_id, payload['subject'])
+        task = await write_batcher.create_task(userstory_id, payload)
+        await asyncio.to_thread(story_store.upsert_tasks, [task])
+        await index_subjects(f"tasks:{userstory_id}", [(task["id"], task["subject"])])
+        return task
     except Exception as e:
-        log.error(f"Error creating sub-task: {e}")
+        log.error("Error creating sub-task: %s", e)
         raise
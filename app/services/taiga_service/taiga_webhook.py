@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import hmac
+from typing import Optional
+
+from app.config import TAIGA_WEBHOOK_SECRET
+from app.logger.logger import log
+from app.metrics.metrics import webhook_events_total
+from app.services.taiga_service.records import StoryRecord, TaskRecord
+from app.services.taiga_service.story_store import story_store
+from app.services.taiga_service.taiga_service import invalidate_metadata_cache, peek_metadata_cache, get_project_id, \
+    index_subjects, unindex_subjects
+
+# Webhook payloads nest related objects; the REST API (and so the store) only keeps their ids
+_NESTED_FIELDS = ("project", "status", "user_story", "priority", "milestone", "owner", "assigned_to")
+
+
+def verify_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Check the ``X-TAIGA-WEBHOOK-SIGNATURE`` header: an HMAC-SHA1 hex digest of the raw body."""
+    if not TAIGA_WEBHOOK_SECRET or not signature:
+        return False
+    expected = hmac.new(TAIGA_WEBHOOK_SECRET.encode(), body, hashlib.sha1).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def _flatten(data: dict) -> dict:
+    item = dict(data)
+    for field in _NESTED_FIELDS:
+        if isinstance(item.get(field), dict):
+            item[field] = item[field].get("id")
+    return item
+
+
+def _is_stale(current: Optional[StoryRecord | TaskRecord], incoming: dict) -> bool:
+    """True when an out-of-order event is older than what the store already has."""
+    return bool(
+        current and current.modified_date and incoming.get("modified_date")
+        and incoming["modified_date"] < current.modified_date
+    )
+
+
+async def apply_webhook_event(event: dict) -> str:
+    """Apply a userstory or task event to the story store and the dedup indexes; returns what was done."""
+    event_type, action = event.get("type"), event.get("action")
+    item = _flatten(event.get("data") or {})
+    if event_type not in ("userstory", "task") or item.get("id") is None or item.get("project") != await get_project_id():
+        result = "ignored"
+    elif event_type == "userstory":
+        result = await _apply_story(action, item)
+    else:
+        result = await _apply_task(action, item)
+    webhook_events_total.inc(type=str(event_type), action=str(action), result=result)
+    log.info("Taiga webhook %s %s %s: %s", event_type, action, item.get("id"), result)
+    return result
+
+
+async def _apply_story(action: str, story: dict) -> str:
+    current = await asyncio.to_thread(story_store.get_story, story["id"])
+    if action == "delete":
+        await asyncio.to_thread(story_store.delete_story, story["id"])
+        await unindex_subjects("stories", [story["id"]])
+        return "deleted"
+    if action not in ("create", "change"):
+        return "ignored"
+    if _is_stale(current, story):
+        return "stale"
+
+    await asyncio.to_thread(story_store.upsert_stories, [story])
+    await index_subjects("stories", [(story["id"], story["subject"])])
+    await _check_status("userstory_statuses", story)
+    return "applied"
+
+
+async def _apply_task(action: str, task: dict) -> str:
+    current = await asyncio.to_thread(story_store.get_task, task["id"])
+    if action == "delete":
+        await asyncio.to_thread(story_store.delete_task, task["id"])
+        await _remove_task_from_indexes(task["id"], current.user_story if current else task.get("user_story"))
+        return "deleted"
+    if action not in ("create", "change"):
+        return "ignored"
+    if _is_stale(current, task):
+        return "stale"
+
+    # A task moved to another story leaves the old story's scope
+    if current and current.user_story != task.get("user_story"):
+        await _remove_task_from_indexes(current.id, current.user_story)
+    await asyncio.to_thread(story_store.upsert_tasks, [task])
+    if task.get("user_story"):
+        await index_subjects(f"tasks:{task['user_story']}", [(task["id"], task["subject"])])
+    await _check_status("task_statuses", task)
+    return "applied"
+
+
+async def _remove_task_from_indexes(task_id: int, story_id: Optional[int]) -> None:
+    if story_id:
+        await unindex_subjects(f"tasks:{story_id}", [task_id])
+
+
+async def _check_status(kind: str, item: dict) -> None:
+    """A status the metadata cache does not know about means the project's statuses changed."""
+    key = f"{kind}:{item.get('project')}"
+    statuses = await peek_metadata_cache(key)
+    if statuses is not None and item.get("status") not in {status["id"] for status in statuses}:
+        await invalidate_metadata_cache(key)
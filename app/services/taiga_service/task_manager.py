@@ -1,16 +1,57 @@
+import asyncio
+from typing import Optional
 
+from app.config import CONCURRENT_ENRICHMENT, LLM_SINGLE_SHOT, DEDUP_LOCK_TTL, IDEMPOTENCY_WINDOW
 from app.logger.logger import log
-from app.services.llm_service.llm_service import enrich_task_description, choose_priority, classify_prompt
+from app.metrics.metrics import pipeline_stage_seconds, teams_messages_total, coalesced_messages_total
+from app.services.cache_service.shared_cache import shared_cache
+from app.services.llm_service.llm_service import enrich_task_description, choose_priority, classify_prompt, \
+    find_text_match, shortlist_candidates, confident_duplicate, analyze_message, text_candidates, text_verdict
+from app.services.llm_service.text_index import TextIndex
 from app.services.taiga_service.taiga_service import get_project_id, get_userstory_status, get_priority_id, \
-    create_user_story_entry, get_task_status, create_user_story_task, get_all_user_stories, get_all_sub_tasks
+    create_user_story_entry, get_task_status, create_user_story_task, wait_for_story_store, index_sub_tasks, \
+    get_project_priorities
 
+# Normalized message -> task (or batch future) handling the first copy, shared by identical messages arriving meanwhile
+_in_flight: dict[str, asyncio.Future] = {}
 
-def create_taiga_task(title: str) -> dict:
+
+async def resolve_task_fields(
+        title: str, project_id: int, status_func, precomputed: Optional[dict] = None
+) -> tuple[int, str, int]:
+    """Resolve status, enriched description and priority, fanning them out when concurrency is enabled.
+
+    ``precomputed`` carries a description and priority id already produced by the single-shot analysis.
+    """
+    with pipeline_stage_seconds.time(stage="resolve_fields"):
+        return await _resolve_task_fields(title, project_id, status_func, precomputed)
+
+
+async def _resolve_task_fields(title: str, project_id: int, status_func, precomputed: Optional[dict]) -> tuple[int, str, int]:
+    if precomputed:
+        status_id = await status_func(project_id)
+        return status_id, precomputed["description"], precomputed["priority_id"]
+
+    if CONCURRENT_ENRICHMENT:
+        status_id, description, priority_id = await asyncio.gather(
+            status_func(project_id),
+            enrich_task_description(title),
+            get_priority_id(title, project_id, choose_priority),
+        )
+        return status_id, description, priority_id
+
+    status_id = await status_func(project_id)
+    description = await enrich_task_description(title)
+    priority_id = await get_priority_id(title, project_id, choose_priority)
+    return status_id, description, priority_id
+
+
+async def create_taiga_task(title: str, precomputed: Optional[dict] = None) -> dict:
     try:
-        project_id = get_project_id()
-        status_id = get_userstory_status(project_id)
-        description = enrich_task_description(title)
-        priority_id = get_priority_id(title, project_id, choose_priority)
+        project_id = await get_project_id()
+        status_id, description, priority_id = await resolve_task_fields(
+            title, project_id, get_userstory_status, precomputed
+        )
 
         payload = {
             "project": project_id,
@@ -22,19 +63,20 @@ def create_taiga_task(title: str) -> dict:
             "version": 1
         }
 
-        log.info(f"Creating new user story: {title}")
-        return create_user_story_entry(payload)
+        log.info("Creating new user story: %s", title)
+        with pipeline_stage_seconds.time(stage="create_story"):
+            return await create_user_story_entry(payload)
     except Exception as e:
-        log.error(f"Failed to create user story for '{title}': {e}")
+        log.error("Failed to create user story for '%s': %s", title, e)
         raise
 
 
-def create_sub_task(userstory_id: int, title: str) -> dict:
+async def create_sub_task(userstory_id: int, title: str, precomputed: Optional[dict] = None) -> dict:
     try:
-        project_id = get_project_id()
-        status_id = get_task_status(project_id)
-        description = enrich_task_description(title)
-        priority_id = get_priority_id(title, project_id, choose_priority)
+        project_id = await get_project_id()
+        status_id, description, priority_id = await resolve_task_fields(
+            title, project_id, get_task_status, precomputed
+        )
 
         payload = {
             "subject": title,
@@ -45,49 +87,349 @@ def create_sub_task(userstory_id: int, title: str) -> dict:
             "priority": priority_id
         }
 
-        log.info(f"Creating sub-task '{title}' under story {userstory_id}")
-        return create_user_story_task(userstory_id, payload)
+        log.info("Creating sub-task '%s' under story %s", title, userstory_id)
+        with pipeline_stage_seconds.time(stage="create_sub_task"):
+            return await create_user_story_task(userstory_id, payload)
     except Exception as e:
-        log.error(f"Failed to create sub-task '{title}' under story {userstory_id}: {e}")
+        log.error("Failed to create sub-task '%s' under story %s: %s", title, userstory_id, e)
         raise
 
 
-def handle_teams_message(message: str):
+async def apply_verdict(message: str, duplicate, precomputed: Optional[dict] = None) -> dict:
+    """Act on a dedup verdict: create a story (None), skip a duplicate (D<id>) or file a sub-task (S<id>)."""
+    if duplicate is None:
+        story = await create_taiga_task(message, precomputed)
+        log.info("Created new user story: %s", story.get('subject'))
+        return {"message": "New story created", "story": message}
+
+    elif duplicate.startswith("D"):
+        original = duplicate[1:]
+        log.info("Detected duplicate story. Incoming: '%s' ~ Existing: '%s'", message, original)
+        return {"message": "Duplicate story. Skipping."}
+
+    elif duplicate.startswith("S"):
+        story_id = int(duplicate[1:])
+        with pipeline_stage_seconds.time(stage="list_sub_tasks"):
+            sub_task_ids = await index_sub_tasks(story_id)
+        with pipeline_stage_seconds.time(stage="classify_sub_task"):
+            duplicate_sub = await classify_prompt(message, f"tasks:{story_id}", sub_task_ids)
+
+        if duplicate_sub is None:
+            sub_task = await create_sub_task(story_id, message, precomputed)
+            log.info("Created new sub-task '%s' under story %s", sub_task.get('subject'), story_id)
+            return {"message": "New sub-task created", "story": story_id, "sub-task": message}
+        else:
+            log.info("Detected duplicate sub-task. Incoming: '%s' ~ Existing: '%s'", message, duplicate_sub[1:])
+            return {"message": "Duplicate sub-task. Skipping."}
+
+
+async def classify_single_shot(message: str) -> tuple[Optional[str], Optional[dict]]:
+    """Get the dedup verdict, description and priority from one LLM call.
+
+    Falls back to ``classify_prompt`` (and later per-function enrichment) when the answer does not validate.
+    """
+    matches = text_candidates(message)
+    match = text_verdict(message, matches)
+    if match:
+        return match, None
+
+    candidates = await shortlist_candidates(message, text_matches=matches)
+    duplicate = confident_duplicate(candidates) if candidates else None
+    if duplicate:
+        return duplicate, None
+
+    project_id = await get_project_id()
+    priorities = await get_project_priorities(project_id)
+    analysis = await analyze_message(message, [(story_id, subject) for story_id, subject, _ in candidates], priorities)
+    if analysis is None:
+        log.info("Single-shot analysis failed for '%s'. Falling back to per-function path.", message)
+        return await classify_prompt(message), None
+
+    priority_id = next(p["id"] for p in priorities if p["name"] == analysis["priority"])
+    return analysis["verdict"], {"description": analysis["description"], "priority_id": priority_id}
+
+
+_OUTCOMES = {
+    "New story created": "new_story",
+    "New sub-task created": "sub_task",
+    "Duplicate story. Skipping.": "duplicate_story",
+    "Duplicate sub-task. Skipping.": "duplicate_sub_task",
+    "Empty message. Skipping.": "empty",
+}
+
+
+def is_handled(result: dict) -> bool:
+    """Whether a result is one of the pipeline's outcomes, as opposed to an error reported as a result."""
+    return result.get("message") in _OUTCOMES
+
+
+def record_outcome(result: dict) -> dict:
+    """Count a handled message by outcome; anything unrecognised is an error."""
+    teams_messages_total.inc(outcome=_OUTCOMES.get(result.get("message"), "error"))
+    return result
+
+
+async def handle_teams_message(message: str):
+    with pipeline_stage_seconds.time(stage="total"):
+        return record_outcome(await _handle_teams_message(message))
+
+
+async def _handle_teams_message(message: str):
     try:
         message = message.strip()
         if not message:
             log.info("Empty message received. Skipping.")
             return {"message": "Empty message. Skipping."}
 
-        log.info(f"Processing Teams message: '{message}'")
-        stories = get_all_user_stories()
-        existing_stories = [(s['id'], s['subject']) for s in stories]
-        duplicate = classify_prompt(message, existing_stories)
+        log.info("Processing Teams message: '%s'", message)
+        return await _coalesce(message)
 
-        if duplicate is None:
-            story = create_taiga_task(message)
-            log.info(f"Created new user story: {story.get('subject')}")
-            return {"message": "New story created", "story": message}
+    except Exception as e:
+        log.error("Error processing message '%s': %s", message, e)
+        return {"message": f"Internal error processing task: {e}"}
 
-        elif duplicate.startswith("D"):
-            original = duplicate[1:]
-            log.info(f"Detected duplicate story. Incoming: '{message}' ~ Existing: '{original}'")
-            return {"message": "Duplicate story. Skipping."}
 
-        elif duplicate.startswith("S"):
-            story_id = int(duplicate[1:])
-            sub_tasks = get_all_sub_tasks(story_id)
-            existing_subs = [(s['id'], s['subject']) for s in sub_tasks]
-            duplicate_sub = classify_prompt(message, existing_subs)
-
-            if duplicate_sub is None:
-                sub_task = create_sub_task(story_id, message)
-                log.info(f"Created new sub-task '{sub_task.get('subject')}' under story {story_id}")
-                return {"message": "New sub-task created", "story": story_id, "sub-task": message}
+def normalize_message(message: str) -> str:
+    return " ".join(message.lower().split())
+
+
+async def _coalesce(message: str) -> dict:
+    """Run the pipeline once for identical messages handled concurrently by this worker and share its result."""
+    key = normalize_message(message)
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_process_exclusively(message, key))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    else:
+        log.info("Coalescing '%s' with an identical message in flight", message)
+        coalesced_messages_total.inc(source="in_flight")
+    # Shielded, so a cancelled caller does not cancel the work the other copies are waiting on
+    return dict(await asyncio.shield(task))
+
+
+async def _process_exclusively(message: str, key: str) -> dict:
+    """Handle one copy of a message at a time across all workers.
+
+    Outcomes are kept for ``IDEMPOTENCY_WINDOW`` seconds. Copies that waited on the dedup lock, and late retries,
+    get the stored outcome instead of classifying against an index that may not include the new story yet.
+    """
+    handled = await _recent_outcome(message, key)
+    if handled is not None:
+        return handled
+
+    with pipeline_stage_seconds.time(stage="dedup_lock"):
+        lock = await shared_cache.acquire_lock(f"dedup:{key}", DEDUP_LOCK_TTL, timeout=DEDUP_LOCK_TTL)
+    if lock is None:
+        log.warning("Timed out waiting for the dedup lock on '%s'. Processing anyway.", message)
+    try:
+        handled = await _recent_outcome(message, key)
+        if handled is not None:
+            return handled
+
+        result = await _process_message(message)
+        await _store_outcome(key, result)
+        return result
+    finally:
+        if lock:
+            await shared_cache.release_lock(f"dedup:{key}", lock)
+
+
+async def _store_outcome(key: str, result: dict) -> None:
+    if IDEMPOTENCY_WINDOW > 0 and is_handled(result):
+        await shared_cache.set(f"outcome:{key}", result, ttl=IDEMPOTENCY_WINDOW)
+
+
+async def _recent_outcome(message: str, key: str) -> Optional[dict]:
+    outcome = await shared_cache.get(f"outcome:{key}")
+    if outcome is not None:
+        log.info("Message '%s' was handled in the last %ss. Returning the stored outcome.", message, IDEMPOTENCY_WINDOW)
+        coalesced_messages_total.inc(source="idempotency_window")
+    return outcome
+
+
+async def _process_message(message: str) -> dict:
+    await wait_for_story_store()
+    with pipeline_stage_seconds.time(stage="classify"):
+        if LLM_SINGLE_SHOT:
+            duplicate, precomputed = await classify_single_shot(message)
+        else:
+            duplicate, precomputed = await classify_prompt(message), None
+    return await apply_verdict(message, duplicate, precomputed)
+
+
+def _as_repeat(result: dict) -> dict:
+    """Outcome for a repeated copy of a message that was already handled earlier in the same batch."""
+    if result.get("message") == "New story created":
+        return {"message": "Duplicate story. Skipping."}
+    if result.get("message") == "New sub-task created":
+        return {"message": "Duplicate sub-task. Skipping."}
+    return result
+
+
+async def handle_teams_messages_batch(messages: list[str]) -> list[dict]:
+    """Process a burst of messages with in-batch dedup and concurrent creation.
+
+    Results are returned in input order and use the same outcomes as ``handle_teams_message``. Each unique
+    message takes the same dedup lock and idempotency window as a single message, so a concurrent or retried
+    copy, in a batch or not, is handled once.
+    """
+    results: list = [None] * len(messages)
+    repeats: dict[int, int] = {}
+    first_seen: dict[str, int] = {}
+    unique: list[tuple[int, str]] = []
+
+    for i, raw in enumerate(messages):
+        message = raw.strip()
+        key = normalize_message(message)
+        if not message:
+            results[i] = {"message": "Empty message. Skipping."}
+        elif key in first_seen:
+            repeats[i] = first_seen[key]
+        else:
+            first_seen[key] = i
+            unique.append((i, message))
+
+    log.info("Processing batch of %s Teams messages (%s unique)", len(messages), len(unique))
+    owned: dict[int, tuple[str, str, asyncio.Future]] = {}
+    pending: list[tuple[int, str]] = []
+    elsewhere: list[tuple[int, str]] = []
+
+    async def settle(i: int) -> None:
+        """Store an owned message's outcome, then let waiting copies through."""
+        key, lock, future = owned.pop(i)
+        if results[i] is None:
+            results[i] = {"message": "Internal error processing task: batch aborted"}
+        try:
+            await _store_outcome(key, results[i])
+        finally:
+            await shared_cache.release_lock(f"dedup:{key}", lock)
+            _in_flight.pop(key, None)
+            future.set_result(results[i])
+
+    async def wait_elsewhere(i: int, message: str) -> None:
+        # Another request or worker is handling this message; wait for its outcome like a single message would
+        results[i] = await _handle_teams_message(message)
+
+    try:
+        for i, message in unique:
+            key = normalize_message(message)
+            handled, lock = await _claim(message, key)
+            if handled is not None:
+                results[i] = handled
+            elif lock is None:
+                elsewhere.append((i, message))
             else:
-                log.info(f"Detected duplicate sub-task. Incoming: '{message}' ~ Existing: '{duplicate_sub[1:]}'")
-                return {"message": "Duplicate sub-task. Skipping."}
+                owned[i] = (key, lock, asyncio.get_running_loop().create_future())
+                _in_flight[key] = owned[i][2]
+                pending.append((i, message))
+
+        await asyncio.gather(
+            _process_batch(pending, results, repeats, settle),
+            *(wait_elsewhere(i, message) for i, message in elsewhere),
+        )
+        for i in repeats:
+            results[i] = _as_repeat(results[_original(repeats, i)])
+    finally:
+        for i in list(owned):
+            await settle(i)
+    return [record_outcome(result) for result in results]
+
+
+async def _claim(message: str, key: str) -> tuple[Optional[dict], Optional[str]]:
+    """Take a batch message's dedup lock without waiting.
 
+    Returns its stored outcome when it was handled recently, the lock token when the batch should handle it,
+    or neither when it is already being handled elsewhere.
+    """
+    if key in _in_flight:
+        return None, None
+    handled = await _recent_outcome(message, key)
+    if handled is not None:
+        return handled, None
+    lock = await shared_cache.acquire_lock(f"dedup:{key}", DEDUP_LOCK_TTL)
+    if lock is None:
+        return None, None
+    handled = await _recent_outcome(message, key)
+    if handled is not None:
+        await shared_cache.release_lock(f"dedup:{key}", lock)
+        return handled, None
+    return None, lock
+
+
+async def _process_batch(pending: list[tuple[int, str]], results: list, repeats: dict[int, int], settle) -> None:
+    if not pending:
+        return
+    try:
+        await wait_for_story_store()
+        with pipeline_stage_seconds.time(stage="classify"):
+            verdicts = await asyncio.gather(*(classify_prompt(message) for _, message in pending))
     except Exception as e:
-        log.error(f"Error processing message '{message}': {e}")
-        return {"message": f"Internal error processing task: {e}"}
+        log.error("Error classifying batch: %s", e)
+        for i, _ in pending:
+            results[i] = {"message": f"Internal error processing task: {e}"}
+            await settle(i)
+        return
+
+    # Messages may still match an earlier message in this batch: a new story, or a sub-task of the same story
+    batch_index = TextIndex()
+    new_in_batch: list[tuple[int, str]] = []
+    parents: dict[int, int] = {}
+    for (i, message), duplicate in zip(pending, verdicts):
+        if duplicate is None:
+            match = find_text_match(message, "batch", batch_index)
+            if not match:
+                new_in_batch.append((i, message))
+                batch_index.upsert("batch", [(i, message)])
+                continue
+            if match.startswith("D"):
+                repeats[i] = int(match[1:])
+                continue
+            parents[i] = int(match[1:])
+            scope = f"batch:{parents[i]}"
+        elif duplicate.startswith("S"):
+            scope = f"story:{duplicate[1:]}"
+        else:
+            continue
+        match = find_text_match(message, scope, batch_index)
+        if match:
+            repeats[i] = int(match[1:])
+            parents.pop(i, None)
+        else:
+            batch_index.upsert(scope, [(i, message)])
+
+    story_tasks = {i: asyncio.create_task(create_taiga_task(message)) for i, message in new_in_batch}
+
+    async def process(i: int, message: str, duplicate) -> None:
+        try:
+            if i in story_tasks:
+                story = await story_tasks[i]
+                log.info("Created new user story: %s", story.get('subject'))
+                results[i] = {"message": "New story created", "story": message}
+            elif i in parents:
+                story = await story_tasks[parents[i]]
+                sub_task = await create_sub_task(story["id"], message)
+                log.info("Created new sub-task '%s' under story %s", sub_task.get('subject'), story['id'])
+                results[i] = {"message": "New sub-task created", "story": story["id"], "sub-task": message}
+            else:
+                results[i] = await apply_verdict(message, duplicate)
+        except Exception as e:
+            log.error("Error processing message '%s': %s", message, e)
+            results[i] = {"message": f"Internal error processing task: {e}"}
+        await settle(i)
+
+    await asyncio.gather(*(
+        process(i, message, duplicate) for (i, message), duplicate in zip(pending, verdicts) if i not in repeats
+    ))
+    # Settle in-batch repeats now rather than after the whole batch, which may be waiting on other requests
+    for i, _ in pending:
+        if i in repeats:
+            results[i] = _as_repeat(results[_original(repeats, i)])
+            await settle(i)
+
+
+def _original(repeats: dict[int, int], i: int) -> int:
+    original = repeats[i]
+    while original in repeats:
+        original = repeats[original]
+    return original
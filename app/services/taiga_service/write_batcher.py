@@ -0,0 +1,134 @@
+import asyncio
+
+from app.api_clients.taiga_client import create_user_story, create_userstory_task, bulk_create_user_stories, \
+    bulk_create_tasks, update_user_story, update_task
+from app.config import TAIGA_BULK_CREATE, TAIGA_BULK_WINDOW, TAIGA_BULK_MAX_SIZE
+from app.logger.logger import log
+from app.metrics.metrics import write_batch_size
+
+# Fields the bulk endpoints set themselves; everything else in a payload is applied by a follow-up patch
+_BULK_FIELDS = {"project", "status", "subject", "user_story", "version"}
+
+
+def _bulk_safe(subject: str) -> bool:
+    # Bulk endpoints take one subject per line and strip it, so those subjects would not come back unchanged
+    return bool(subject) and subject == subject.strip() and "\n" not in subject and "\r" not in subject
+
+
+class WriteBatcher:
+    """Collects story and sub-task creates for up to ``window`` seconds and sends them through Taiga's bulk endpoints.
+
+    Creates are grouped by what a bulk call shares: the project and status, plus the story for sub-tasks. A group
+    is sent when the window closes or it reaches ``max_size``. A group of one goes through the regular create.
+    Every caller still gets its own created item, with the rest of its payload applied by a follow-up patch.
+    """
+
+    def __init__(self, enabled: bool, window: float, max_size: int):
+        self.enabled = enabled and window > 0 and max_size > 1
+        self.window = window
+        self.max_size = max_size
+        self._groups: dict[tuple, list[tuple[dict, asyncio.Future]]] = {}
+        self._timers: dict[tuple, asyncio.Task] = {}
+        self._flushing: set[asyncio.Task] = set()
+
+    async def create_user_story(self, payload: dict) -> dict:
+        if not self.enabled or not _bulk_safe(payload["subject"]):
+            return await create_user_story(payload)
+        return await self._submit(("userstories", payload["project"], payload["status"]), payload)
+
+    async def create_task(self, userstory_id: int, payload: dict) -> dict:
+        if not self.enabled or not _bulk_safe(payload["subject"]):
+            return await create_userstory_task(userstory_id, payload)
+        payload = {**payload, "user_story": userstory_id}
+        return await self._submit(("tasks", payload["project"], payload["status"], userstory_id), payload)
+
+    async def _submit(self, key: tuple, payload: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        group = self._groups.setdefault(key, [])
+        group.append((payload, future))
+        if len(group) >= self.max_size:
+            timer = self._timers.pop(key, None)
+            if timer:
+                timer.cancel()
+            task = asyncio.create_task(self._flush(key, self._groups.pop(key)))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key))
+        return await future
+
+    async def _flush_later(self, key: tuple) -> None:
+        await asyncio.sleep(self.window)
+        del self._timers[key]
+        await self._flush(key, self._groups.pop(key))
+
+    async def _flush(self, key: tuple, entries: list[tuple[dict, asyncio.Future]]) -> None:
+        kind = key[0]
+        write_batch_size.observe(len(entries), kind=kind)
+        if len(entries) == 1:
+            payload, future = entries[0]
+            try:
+                if kind == "userstories":
+                    item = await create_user_story(payload)
+                else:
+                    item = await create_userstory_task(payload["user_story"], payload)
+                _resolve(future, item)
+            except Exception as e:
+                _fail(future, e)
+            return
+
+        subjects = [payload["subject"] for payload, _ in entries]
+        try:
+            if kind == "userstories":
+                created = await bulk_create_user_stories(key[1], key[2], subjects)
+            else:
+                created = await bulk_create_tasks(key[1], key[3], key[2], subjects)
+            items = _match_created(subjects, created)
+        except Exception as e:
+            log.error("Bulk create of %s %s failed: %s", len(entries), kind, e)
+            for _, future in entries:
+                _fail(future, e)
+            return
+
+        await asyncio.gather(*(
+            self._complete(kind, payload, item, future) for (payload, future), item in zip(entries, items)
+        ))
+
+    @staticmethod
+    async def _complete(kind: str, payload: dict, item: dict, future: asyncio.Future) -> None:
+        fields = {field: value for field, value in payload.items() if field not in _BULK_FIELDS}
+        if fields:
+            update = update_user_story if kind == "userstories" else update_task
+            try:
+                item = await update(item["id"], {**fields, "version": item["version"]})
+            except Exception as e:
+                # The item exists either way; hand it back so it is recorded instead of created again
+                log.error("Created %s %s but could not apply its fields: %s", kind, item["id"], e)
+        _resolve(future, item)
+
+
+def _match_created(subjects: list[str], created: list[dict]) -> list[dict]:
+    """Pair each requested subject with the item created for it, in request order."""
+    if len(created) != len(subjects):
+        raise RuntimeError(f"Taiga created {len(created)} items for {len(subjects)} subjects")
+    by_subject: dict[str, list[dict]] = {}
+    for item in sorted(created, key=lambda item: item["id"]):
+        by_subject.setdefault(item["subject"], []).append(item)
+    try:
+        return [by_subject[subject].pop(0) for subject in subjects]
+    except (KeyError, IndexError):
+        raise RuntimeError("Taiga returned subjects that do not match the bulk request")
+
+
+def _resolve(future: asyncio.Future, item: dict) -> None:
+    # The caller may have been cancelled while the batch was in flight
+    if not future.done():
+        future.set_result(item)
+
+
+def _fail(future: asyncio.Future, error: Exception) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
+write_batcher = WriteBatcher(TAIGA_BULK_CREATE, TAIGA_BULK_WINDOW, TAIGA_BULK_MAX_SIZE)
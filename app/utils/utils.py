@@ -1,4 +1,6 @@
+import json
 import os
+from typing import Iterable, Iterator
 
 def create_folder(file_path) -> str:
 
@@ -9,4 +11,17 @@ def create_folder(file_path) -> str:
         os.makedirs(folder_path, exist_ok=True)
         return f"Directory created successfully: {file_path}"
     except OSError as e:
-        raise IOError(f"Error creating directory {folder_path}: {e}") from e
\ No newline at end of file
+        raise IOError(f"Error creating directory {folder_path}: {e}") from e
+
+def stream_json_array(items: Iterable, chunk_size: int = 200) -> Iterator[str]:
+    """Serialize items as a JSON array in chunks of ``chunk_size`` items, without building the full list."""
+    yield "["
+    chunk, first = [], True
+    for item in items:
+        chunk.append(json.dumps(item))
+        if len(chunk) >= chunk_size:
+            yield ("" if first else ",") + ",".join(chunk)
+            chunk, first = [], False
+    if chunk:
+        yield ("" if first else ",") + ",".join(chunk)
+    yield "]"
@@ -0,0 +1,173 @@
+"""In-process stand-ins for the Taiga REST API and Ollama, served through ``httpx.MockTransport``."""
+import asyncio
+import json
+import random
+import re
+
+import httpx
+
+
+class FakeUpstream:
+    """Latency and failure injection shared by both fakes."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls: dict[str, int] = {}
+        self._random = random.Random(seed)
+
+    async def _delay(self) -> None:
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _failed(self) -> bool:
+        return self.error_rate > 0 and self._random.random() < self.error_rate
+
+
+class FakeTaiga(FakeUpstream):
+    """A single project with ``stories`` user stories and ``tasks_per_story`` tasks each."""
+
+    PRIORITIES = [{"id": 1, "name": "Low"}, {"id": 2, "name": "Normal"}, {"id": 3, "name": "High"}]
+
+    def __init__(self, stories: int = 100, tasks_per_story: int = 2, **kwargs):
+        super().__init__(**kwargs)
+        self.stories: dict[int, dict] = {}
+        self.tasks: dict[int, dict] = {}
+        self._next_id = 1
+        for n in range(stories):
+            story = self._add(self.stories, {"subject": f"Story {n} about feature area {n % 97}", "user_story": None})
+            for t in range(tasks_per_story):
+                self._add(self.tasks, {"subject": f"Task {t} of story {n}", "user_story": story["id"]})
+
+    def _add(self, table: dict, fields: dict) -> dict:
+        item = {
+            "id": self._next_id, "project": 1, "status": 1, "priority": 2, "description": "", "version": 1,
+            "modified_date": f"2024-01-01T00:00:{self._next_id:09d}Z", **fields,
+        }
+        table[item["id"]] = item
+        self._next_id += 1
+        return item
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await self._delay()
+        path = re.sub(r"^/api/v1", "", request.url.path)
+        self._count(f"{request.method} {re.sub(r'/[0-9]+$', '/{id}', path)}")
+        if self._failed():
+            return httpx.Response(503)
+
+        if path == "/auth" or path == "/auth/refresh":
+            return httpx.Response(200, json={"auth_token": "benchmark-token", "refresh": "benchmark-refresh"})
+        if path == "/projects/by_slug":
+            return httpx.Response(200, json={"id": 1, "slug": request.url.params.get("slug")})
+        if path in ("/userstory-statuses", "/task-statuses"):
+            return httpx.Response(200, json=[{"id": 1, "name": "New"}])
+        if path == "/priorities":
+            return httpx.Response(200, json=self.PRIORITIES)
+        if path in ("/userstories", "/tasks"):
+            table = self.stories if path == "/userstories" else self.tasks
+            if request.method == "POST":
+                body = json.loads(request.content)
+                return httpx.Response(201, json=self._add(table, body))
+            return self._list(request, table)
+        if path in ("/userstories/bulk_create", "/tasks/bulk_create"):
+            return httpx.Response(200, json=self._bulk_create(path, json.loads(request.content)))
+        match = re.fullmatch(r"/(userstories|tasks)/(\d+)", path)
+        if match:
+            table = self.stories if match.group(1) == "userstories" else self.tasks
+            item = table.get(int(match.group(2)))
+            if item and request.method == "PATCH":
+                item.update({**json.loads(request.content), "version": item["version"] + 1})
+            return httpx.Response(200, json=item) if item else httpx.Response(404)
+        return httpx.Response(404)
+
+    def _bulk_create(self, path: str, body: dict) -> list[dict]:
+        if path == "/userstories/bulk_create":
+            table, lines, fields = self.stories, body["bulk_stories"], {"user_story": None}
+        else:
+            table, lines, fields = self.tasks, body["bulk_tasks"], {"user_story": body["us_id"]}
+        subjects = [line.strip() for line in lines.split("\n") if line.strip()]
+        return [
+            self._add(table, {"subject": subject, "status": body["status_id"], **fields}) for subject in subjects
+        ]
+
+    @staticmethod
+    def _list(request: httpx.Request, table: dict) -> httpx.Response:
+        params = request.url.params
+        items = list(table.values())
+        if "user_story" in params:
+            items = [item for item in items if str(item["user_story"]) == params["user_story"]]
+        if "modified_date__gt" in params:
+            items = [item for item in items if item["modified_date"] > params["modified_date__gt"]]
+        page, size = int(params.get("page", 1)), int(params.get("page_size", 100))
+        headers = {}
+        if page * size < len(items):
+            headers["x-pagination-next"] = str(request.url.copy_set_param("page", page + 1))
+        return httpx.Response(200, json=items[(page - 1) * size:page * size], headers=headers)
+
+
+class FakeOllama(FakeUpstream):
+    """Answers every prompt the pipeline sends, deterministically.
+
+    Dedup prompts get ``D<id>`` for an exact subject match and ``None`` otherwise. Streaming answers are sent
+    in chunks of ``chunk_size`` characters, ``token_latency`` seconds apart.
+    """
+
+    def __init__(self, token_latency: float = 0.0, chunk_size: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.token_latency = token_latency
+        self.chunk_size = chunk_size
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await self._delay()
+        body = json.loads(request.content)
+        self._count("generate_stream" if body.get("stream") else "generate")
+        if self._failed():
+            return httpx.Response(503)
+
+        answer = self._answer(body["prompt"], body.get("format"))
+        if not body.get("stream"):
+            return httpx.Response(200, json={"response": answer, "done": True})
+        return httpx.Response(200, content=self._stream(answer))
+
+    async def _stream(self, answer: str):
+        for i in range(0, len(answer), self.chunk_size):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield (json.dumps({"response": answer[i:i + self.chunk_size], "done": False}) + "\n").encode()
+        yield (json.dumps({"response": "", "done": True}) + "\n").encode()
+
+    def _answer(self, prompt: str, response_format: str | None) -> str:
+        verdict = self._verdict(prompt)
+        if response_format == "json":
+            return json.dumps({"verdict": verdict, "description": "Benchmark description.", "priority": "Normal"})
+        if "decide the best priority" in prompt:
+            return "Normal"
+        if "Existing Stories:" in prompt:
+            return verdict
+        return "Benchmark description of the task in two sentences. It exists to measure latency."
+
+    @staticmethod
+    def _verdict(prompt: str) -> str:
+        message = re.search(r"New (?:Prompt|message): (.*)", prompt)
+        stories = prompt.split("Existing Stories:\n", 1)[-1].splitlines()
+        if message:
+            for line in stories:
+                story_id, _, subject = line.partition(" - ")
+                if subject.strip().lower() == message.group(1).strip().lower():
+                    return f"D{story_id}"
+        return "None"
+
+
+def install(taiga: FakeTaiga, ollama: FakeOllama) -> None:
+    """Point the app's pooled Taiga and Ollama clients at the fakes."""
+    from app.api_clients import llm_client, taiga_client
+
+    taiga_client._client = httpx.AsyncClient(
+        base_url=taiga_client.TAIGA_API_URL, transport=httpx.MockTransport(taiga.handle)
+    )
+    llm_client._client = httpx.AsyncClient(transport=httpx.MockTransport(ollama.handle))
@@ -0,0 +1,147 @@
+"""Benchmark the message pipeline and GET routes against in-process fake Taiga and Ollama servers.
+
+    python -m benchmarks.run burst --stories 5000 --requests 200 --concurrency 20 --taiga-latency 0.05
+
+Settings the app reads from the environment (dedup strategy, caches, ...) can be set with ``--set KEY=VALUE``
+to compare strategies, e.g. ``--set LLM_SINGLE_SHOT=true`` or ``--set EMBEDDING_INDEX_ENABLED=false``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", choices=["single", "burst", "duplicates", "queued", "classify", "reads"])
+    parser.add_argument("--stories", type=int, default=1000, help="backlog size in the fake Taiga (100 to 50000)")
+    parser.add_argument("--tasks-per-story", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.5, help="share of repeated messages (duplicates)")
+    parser.add_argument("--taiga-latency", type=float, default=0.02, help="seconds added to every Taiga call")
+    parser.add_argument("--taiga-error-rate", type=float, default=0.0, help="share of Taiga calls answered with 503")
+    parser.add_argument("--ollama-latency", type=float, default=0.2, help="seconds before Ollama starts answering")
+    parser.add_argument("--ollama-token-latency", type=float, default=0.005, help="seconds between streamed chunks")
+    parser.add_argument("--ollama-error-rate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to this many seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="app setting override")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Keep benchmark runs away from the real stores and log file; must run before the app is imported."""
+    workdir = tempfile.mkdtemp(prefix="teams_taiga_bench_")
+    os.environ.update({
+        "TAIGA_PROJECT_SLUG": "benchmark",
+        "STORY_STORE_PATH": ":memory:",
+        "LLM_CACHE_PATH": "",
+        "SHARED_CACHE_BACKEND": "memory",
+        "LOG_LEVEL": "WARNING",
+        "LOG_FILE": os.path.join(workdir, "benchmark.log"),
+        "RETRY_BASE_DELAY": "0.01",
+        "JOB_QUEUE_SIZE": str(max(args.requests, 100)),
+    })
+    for override in args.set:
+        key, _, value = override.partition("=")
+        os.environ[key] = value
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def build_report(args: argparse.Namespace, samples: list, elapsed: float, taiga, ollama) -> dict:
+    latencies = sorted(sample.latency for sample in samples)
+    return {
+        "scenario": args.scenario,
+        "stories": args.stories,
+        "requests": len(samples),
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "errors": sum(1 for sample in samples if not sample.ok),
+        "latency_ms": {
+            name: round(value * 1000, 2) for name, value in (
+                ("p50", percentile(latencies, 50)), ("p95", percentile(latencies, 95)),
+                ("p99", percentile(latencies, 99)), ("max", latencies[-1] if latencies else 0.0),
+            )
+        },
+        "outcomes": dict(Counter(sample.outcome for sample in samples).most_common()),
+        "taiga_calls": dict(sorted(taiga.calls.items())),
+        "ollama_calls": dict(sorted(ollama.calls.items())),
+        "settings": args.set,
+    }
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency_ms"]
+    print(f"scenario {report['scenario']} with {report['stories']} stories, concurrency {report['concurrency']}")
+    print(f"  {report['requests']} requests in {report['elapsed_s']}s ({report['rps']} req/s), {report['errors']} errors")
+    print(f"  latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    for section in ("outcomes", "taiga_calls", "ollama_calls"):
+        print(f"  {section}: " + ", ".join(f"{key}={value}" for key, value in report[section].items()))
+    if report["settings"]:
+        print(f"  settings: {' '.join(report['settings'])}")
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from app.main import app
+    from app.services.startup_service.startup import startup
+    from benchmarks.fakes import FakeTaiga, FakeOllama, install
+    from benchmarks.scenarios import SCENARIOS, Context
+
+    taiga = FakeTaiga(
+        stories=args.stories, tasks_per_story=args.tasks_per_story, latency=args.taiga_latency,
+        jitter=args.jitter, error_rate=args.taiga_error_rate, seed=args.seed,
+    )
+    ollama = FakeOllama(
+        latency=args.ollama_latency, token_latency=args.ollama_token_latency, jitter=args.jitter,
+        error_rate=args.ollama_error_rate, seed=args.seed,
+    )
+    install(taiga, ollama)
+    stories = list(taiga.stories.values())
+
+    # Startup (cache warm-up, store sync, index build) runs before the clock starts
+    async with app.router.lifespan_context(app):
+        await startup.wait_ready()
+        async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None
+        ) as client:
+            taiga.calls.clear()
+            ollama.calls.clear()
+            ctx = Context(
+                client=client, requests=args.requests, concurrency=args.concurrency,
+                duplicate_ratio=args.duplicate_ratio, story_ids=[story["id"] for story in stories],
+                story_subjects=[story["subject"] for story in stories], random=random.Random(args.seed),
+            )
+            started = time.perf_counter()
+            samples = await SCENARIOS[args.scenario](ctx)
+            elapsed = time.perf_counter() - started
+    return build_report(args, samples, elapsed, taiga, ollama)
+
+
+def main() -> None:
+    args = parse_args()
+    configure_environment(args)
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Load-generation scenarios. Each one returns a ``Sample`` per request it made."""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+
+@dataclass
+class Sample:
+    latency: float
+    ok: bool
+    outcome: str
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    requests: int
+    concurrency: int
+    duplicate_ratio: float
+    story_ids: list[int]
+    story_subjects: list[str]
+    random: random.Random
+
+
+async def _measure(call: Callable[[], Awaitable[tuple[bool, str]]]) -> Sample:
+    started = time.perf_counter()
+    try:
+        ok, outcome = await call()
+    except Exception as e:
+        ok, outcome = False, type(e).__name__
+    return Sample(time.perf_counter() - started, ok, outcome)
+
+
+async def _run_concurrently(ctx: Context, calls: list[Callable[[], Awaitable[tuple[bool, str]]]]) -> list[Sample]:
+    semaphore = asyncio.Semaphore(ctx.concurrency)
+
+    async def bounded(call):
+        async with semaphore:
+            return await _measure(call)
+
+    return list(await asyncio.gather(*(bounded(call) for call in calls)))
+
+
+def _post_message(ctx: Context, message: str):
+    async def call() -> tuple[bool, str]:
+        response = await ctx.client.post("/teams/simulate", params={"wait": "true"}, json={"message": message})
+        outcome = response.json().get("message", str(response.status_code)) if response.is_success else str(response.status_code)
+        return response.is_success and not outcome.startswith("Internal error"), outcome
+    return call
+
+
+def _unique_messages(ctx: Context, prefix: str) -> list[str]:
+    return [f"{prefix} request {n}: add a setting for option {ctx.random.randint(0, 10 ** 6)}" for n in range(ctx.requests)]
+
+
+async def single(ctx: Context) -> list[Sample]:
+    """One new message at a time, for per-message latency without contention."""
+    return [await _measure(_post_message(ctx, message)) for message in _unique_messages(ctx, "Single")]
+
+
+async def burst(ctx: Context) -> list[Sample]:
+    """Unique new messages sent ``concurrency`` at a time."""
+    return await _run_concurrently(ctx, [_post_message(ctx, message) for message in _unique_messages(ctx, "Burst")])
+
+
+async def duplicates(ctx: Context) -> list[Sample]:
+    """A burst where ``duplicate_ratio`` of the messages repeat an existing story or an earlier message."""
+    pool = _unique_messages(ctx, "Repeated")[:max(1, ctx.requests // 10)]
+    messages = []
+    for n in range(ctx.requests):
+        if ctx.random.random() >= ctx.duplicate_ratio:
+            messages.append(f"Fresh request {n}: track option {ctx.random.randint(0, 10 ** 6)}")
+        elif ctx.story_subjects and ctx.random.random() < 0.5:
+            messages.append(ctx.random.choice(ctx.story_subjects))
+        else:
+            messages.append(ctx.random.choice(pool))
+    return await _run_concurrently(ctx, [_post_message(ctx, message) for message in messages])
+
+
+async def queued(ctx: Context) -> list[Sample]:
+    """Messages submitted to the job queue, measured from submission until the job finishes."""
+    async def call(message: str) -> tuple[bool, str]:
+        response = await ctx.client.post("/teams/simulate", json={"message": message})
+        if response.status_code != 202:
+            return False, str(response.status_code)
+        status_url = response.json()["status_url"]
+        while True:
+            job = (await ctx.client.get(status_url)).json()
+            if job["status"] in ("done", "failed"):
+                outcome = (job["result"] or {}).get("message", job["status"])
+                return job["status"] == "done" and not outcome.startswith("Internal error"), outcome
+            await asyncio.sleep(0.01)
+
+    return await _run_concurrently(ctx, [lambda m=message: call(m) for message in _unique_messages(ctx, "Queued")])
+
+
+async def classify(ctx: Context) -> list[Sample]:
+    """``classify_prompt`` on its own against the full backlog, half exact repeats and half new text."""
+    from app.services.llm_service.llm_service import classify_prompt
+    from app.services.taiga_service.taiga_service import wait_for_story_store
+
+    await wait_for_story_store()
+
+    def call(message: str):
+        async def run() -> tuple[bool, str]:
+            verdict = await classify_prompt(message)
+            return True, "new" if verdict is None else f"{verdict[0]}<id>"
+        return run
+
+    messages = [
+        ctx.random.choice(ctx.story_subjects) if ctx.story_subjects and n % 2 else f"Unrelated idea {n}: {ctx.random.random()}"
+        for n in range(ctx.requests)
+    ]
+    return await _run_concurrently(ctx, [call(message) for message in messages])
+
+
+async def reads(ctx: Context) -> list[Sample]:
+    """The GET routes: story list (streamed), one story, and its tasks."""
+    def get(route: str, url: str, params: Optional[dict] = None):
+        async def call() -> tuple[bool, str]:
+            response = await ctx.client.get(url, params=params)
+            await response.aread()
+            return response.is_success, f"{route} {response.status_code}"
+        return call
+
+    calls = []
+    for n in range(ctx.requests):
+        story_id = ctx.random.choice(ctx.story_ids)
+        calls.append([
+            get("list", "/teams/user_stories", {"stream": "true"}),
+            get("story", f"/teams/user_stories/{story_id}"),
+            get("tasks", f"/teams/user_stories/{story_id}/tasks"),
+        ][n % 3])
+    return await _run_concurrently(ctx, calls)
+
+
+SCENARIOS = {
+    "single": single,
+    "burst": burst,
+    "duplicates": duplicates,
+    "queued": queued,
+    "classify": classify,
+    "reads": reads,
+}
@@ -1,9 +1,21 @@
 import uvicorn
 
+from app.config import APP_ENV, WEB_HOST, WEB_PORT, WEB_WORKERS, SHARED_CACHE_BACKEND
+
 if __name__ == "__main__":
+    development = APP_ENV == "development"
+    workers = 1 if development else WEB_WORKERS
+    # Jobs, locks and tokens must be visible to every worker, which the in-process cache is not
+    if workers > 1 and SHARED_CACHE_BACKEND not in ("sqlite", "redis"):
+        raise SystemExit(
+            f"WEB_WORKERS={workers} needs a shared cache. Set SHARED_CACHE_BACKEND to sqlite or redis, or run one worker."
+        )
+    # Reloading only works with a single worker, so it is limited to development
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+        host=WEB_HOST,
+        port=WEB_PORT,
+        reload=development,
+        workers=workers,
+        proxy_headers=not development,
     )
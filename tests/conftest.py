@@ -0,0 +1,32 @@
+"""Shared test setup. The app reads its settings at import time, so they are set before anything imports it."""
+import asyncio
+import os
+import tempfile
+
+os.environ.update({
+    "TAIGA_PROJECT_SLUG": "tests",
+    "STORY_STORE_PATH": ":memory:",
+    "LLM_CACHE_PATH": "",
+    "SHARED_CACHE_BACKEND": "memory",
+    "EMBEDDING_INDEX_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+    "LOG_FILE": os.path.join(tempfile.mkdtemp(prefix="teams_taiga_tests_"), "tests.log"),
+    "RETRY_BASE_DELAY": "0.01",
+})
+os.environ.pop("TAIGA_WEBHOOK_SECRET", None)
+
+import pytest
+
+from benchmarks.fakes import FakeTaiga, FakeOllama, install
+
+
+@pytest.fixture
+def taiga() -> FakeTaiga:
+    """A small fake Taiga project wired into the app's clients, with the story mirror due for a full sync."""
+    from app.services.taiga_service import taiga_service
+
+    taiga = FakeTaiga(stories=3, tasks_per_story=1)
+    install(taiga, FakeOllama())
+    taiga_service._store_sync_state.update(last_sync=None, last_full_sync=None)
+    taiga_service._store_loaded = asyncio.Event()
+    return taiga
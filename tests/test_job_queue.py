@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services.cache_service.shared_cache import shared_cache, MemoryBackend
+from app.services.job_service import job_queue as job_queue_module
+from app.services.job_service.job_queue import JobQueue, JobQueueFullError
+from app.services.taiga_service.task_manager import is_handled
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    # Job records and published stats from other tests would otherwise show up here
+    monkeypatch.setattr(shared_cache, "backend", MemoryBackend())
+
+
+async def handler(message: str) -> dict:
+    if message == "fail":
+        return {"message": "Internal error processing task: boom"}
+    return {"message": "New story created", "story": message}
+
+
+async def finished(queue: JobQueue, job_id: str) -> dict:
+    for _ in range(100):
+        job = await queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_a_job_can_be_polled_through_another_process():
+    async def run():
+        # Two queues stand in for two worker processes sharing one cache
+        first, second = JobQueue(handler, 1, 10, 60, is_handled), JobQueue(handler, 1, 10, 60, is_handled)
+        await first.start()
+        await second.start()
+        try:
+            job = await first.submit("Add dark mode")
+            return await finished(second, job["id"])
+        finally:
+            await first.stop()
+            await second.stop()
+
+    job = asyncio.run(run())
+
+    assert job["status"] == "done"
+    assert job["result"] == {"message": "New story created", "story": "Add dark mode"}
+
+
+def test_an_error_result_fails_the_job():
+    async def run():
+        queue = JobQueue(handler, 1, 10, 60, is_handled)
+        await queue.start()
+        try:
+            job = await queue.submit("fail")
+            return await finished(queue, job["id"]), queue.stats()
+        finally:
+            await queue.stop()
+
+    job, stats = asyncio.run(run())
+
+    assert job["status"] == "failed"
+    assert (stats["completed"], stats["failed"]) == (0, 1)
+
+
+def test_a_full_queue_rejects_without_keeping_a_record():
+    async def run():
+        queue = JobQueue(handler, 0, 1, 60, is_handled)
+        await queue.start()
+        try:
+            await queue.submit("first")
+            with pytest.raises(JobQueueFullError):
+                await queue.submit("second")
+            return queue.stats()
+        finally:
+            await queue.stop()
+
+    stats = asyncio.run(run())
+
+    assert (stats["submitted"], stats["rejected"], stats["depth"]) == (1, 1, 1)
+
+
+def test_combined_stats_add_up_every_process(monkeypatch):
+    monkeypatch.setattr(job_queue_module, "_STATS_INTERVAL", 0.01)
+
+    async def run():
+        first, second = JobQueue(handler, 1, 10, 60, is_handled), JobQueue(handler, 2, 10, 60, is_handled)
+        await first.start()
+        await second.start()
+        try:
+            await finished(first, (await first.submit("one"))["id"])
+            await finished(second, (await second.submit("fail"))["id"])
+            await asyncio.sleep(0.05)
+            return await first.combined_stats()
+        finally:
+            await first.stop()
+            await second.stop()
+
+    stats = asyncio.run(run())
+
+    assert stats["processes"] == 2
+    assert (stats["workers"], stats["submitted"], stats["completed"], stats["failed"]) == (3, 2, 1, 1)
+    assert stats["processing_time"]["count"] == 2
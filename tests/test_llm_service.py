@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_service import llm_service
+from app.services.llm_service.llm_cache import LLMCache
+from app.services.llm_service.llm_service import enrich_task_description
+
+
+@pytest.fixture
+def prompts(monkeypatch) -> list[str]:
+    prompts = []
+
+    async def call_llm(prompt: str, **kwargs) -> str:
+        prompts.append(prompt)
+        return f"Answer {len(prompts)}"
+
+    monkeypatch.setattr(llm_service, "call_llm", call_llm)
+    monkeypatch.setattr(llm_service, "llm_cache", LLMCache(max_entries=10, ttl=60))
+    return prompts
+
+
+def test_a_repeated_prompt_is_answered_from_the_cache(prompts):
+    async def enrich():
+        return await enrich_task_description("Add dark mode"), await enrich_task_description("Add dark mode")
+
+    assert asyncio.run(enrich()) == ("Answer 1", "Answer 1")
+    assert len(prompts) == 1
+
+
+def test_an_edited_prompt_does_not_reuse_cached_answers(prompts, monkeypatch):
+    asyncio.run(enrich_task_description("Add dark mode"))
+    monkeypatch.setattr(llm_service, "_ENRICH_PROMPT", "Describe this task: {title}")
+
+    assert asyncio.run(enrich_task_description("Add dark mode")) == "Answer 2"
+    assert prompts[-1] == "Describe this task: Add dark mode"
@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.api_clients import resilience
+from app.api_clients.resilience import CircuitBreaker, CircuitOpenError, call_with_retry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def opened(clock: Clock) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_a_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_trial_through(clock):
+    breaker = opened(clock)
+    clock.now += 10
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_a_successful_trial_closes_the_circuit(clock):
+    breaker = opened(clock)
+    clock.now += 10
+    breaker.before_call()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_a_failed_trial_opens_the_circuit_again(clock):
+    breaker = opened(clock)
+    clock.now += 10
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    clock.now += 5
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 5
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_a_trial_that_never_reports_back_is_replaced(clock):
+    breaker = opened(clock)
+    clock.now += 10
+    breaker.before_call()
+
+    clock.now += 10
+    breaker.before_call()
+
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_a_throttled_trial_closes_the_circuit_and_retries():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    breaker.opened_at = time.monotonic() - 30
+    responses = iter([429, 200])
+
+    async def send() -> httpx.Response:
+        return httpx.Response(next(responses), request=httpx.Request("GET", "http://taiga.test"))
+
+    response = asyncio.run(call_with_retry(breaker, send))
+
+    assert response.status_code == 200
+    assert breaker.state == "closed"
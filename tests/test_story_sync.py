@@ -0,0 +1,112 @@
+import asyncio
+
+from app.services.llm_service.llm_service import find_text_match
+from app.services.taiga_service import taiga_service
+from app.services.taiga_service.story_store import story_store
+from app.services.taiga_service.taiga_service import create_user_story_entry, wait_for_story_store, sync_story_store
+
+
+async def incremental_sync() -> None:
+    # Due immediately, without waiting for STORY_STORE_SYNC_INTERVAL
+    taiga_service._store_sync_state["last_sync"] = None
+    await sync_story_store()
+
+
+def subjects() -> set[str]:
+    return {story["subject"] for story in story_store.iter_stories(["subject"])}
+
+
+def test_a_full_sync_sets_the_watermark_to_the_newest_item(taiga):
+    asyncio.run(sync_story_store(full=True))
+
+    newest = max(story["modified_date"] for story in taiga.stories.values())
+    assert story_store.get_state("sync_watermark:user_stories") == newest
+
+
+def test_an_incremental_sync_fetches_only_changes_since_the_watermark(taiga):
+    async def sync():
+        await sync_story_store(full=True)
+        taiga._add(taiga.stories, {"subject": "Added in Taiga", "user_story": None})
+        await incremental_sync()
+
+    asyncio.run(sync())
+
+    assert "Added in Taiga" in subjects()
+    assert story_store.get_state("sync_watermark:user_stories") == max(
+        story["modified_date"] for story in taiga.stories.values()
+    )
+
+
+def test_our_own_creates_do_not_hide_earlier_changes_by_others(taiga):
+    async def sync():
+        await sync_story_store(full=True)
+        # A colleague's story, then ours with a newer modified date, both before the next sync
+        taiga._add(taiga.stories, {"subject": "Colleague story", "user_story": None})
+        await create_user_story_entry({"project": 1, "subject": "Our story", "status": 1})
+        await incremental_sync()
+
+    asyncio.run(sync())
+
+    assert {"Colleague story", "Our story"} <= subjects()
+
+
+def test_the_watermark_never_moves_back_on_an_incremental_sync(taiga):
+    async def sync():
+        await sync_story_store(full=True)
+        story_store.set_state("sync_watermark:user_stories", "2099-01-01T00:00:00Z")
+        taiga._add(taiga.stories, {"subject": "Older change", "user_story": None})
+        await incremental_sync()
+
+    asyncio.run(sync())
+
+    assert story_store.get_state("sync_watermark:user_stories") == "2099-01-01T00:00:00Z"
+    assert "Older change" not in subjects()
+
+
+def test_a_full_sync_drops_items_taiga_no_longer_has(taiga):
+    removed = taiga.stories[1]["subject"]
+
+    async def sync():
+        await sync_story_store(full=True)
+        del taiga.stories[1]
+        await sync_story_store(full=True)
+
+    asyncio.run(sync())
+
+    assert story_store.get_story(1) is None
+    assert find_text_match(removed) is None
+
+
+def test_synced_and_created_stories_are_searchable_without_listing_the_backlog(taiga):
+    async def sync():
+        await sync_story_store(full=True)
+        taiga._add(taiga.stories, {"subject": "Added in Taiga", "user_story": None})
+        await incremental_sync()
+        await create_user_story_entry({"project": 1, "subject": "Created by us", "status": 1})
+
+    asyncio.run(sync())
+
+    assert find_text_match("Added in Taiga") is not None
+    assert find_text_match("Created by us") is not None
+
+
+def test_readers_do_not_wait_for_a_sync_in_progress(taiga):
+    async def read_during_sync():
+        await sync_story_store(full=True)
+        async with taiga_service._store_sync_lock:
+            await asyncio.wait_for(wait_for_story_store(), timeout=1)
+            return subjects()
+
+    assert len(asyncio.run(read_during_sync())) == len(taiga.stories)
+
+
+def test_readers_wait_for_the_first_full_load(taiga):
+    async def read_before_load():
+        reader = asyncio.create_task(wait_for_story_store())
+        await asyncio.sleep(0.01)
+        assert not reader.done()
+        await sync_story_store(full=True)
+        await asyncio.wait_for(reader, timeout=1)
+        return subjects()
+
+    assert len(asyncio.run(read_before_load())) == len(taiga.stories)
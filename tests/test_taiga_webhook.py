@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import hmac
+
+import pytest
+
+from app.services.llm_service.text_index import text_index
+from app.services.taiga_service import taiga_webhook
+from app.services.taiga_service.story_store import story_store
+from app.services.taiga_service.taiga_service import sync_story_store
+from app.services.taiga_service.taiga_webhook import apply_webhook_event, verify_signature
+
+SECRET = "webhook-secret"
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(taiga_webhook, "TAIGA_WEBHOOK_SECRET", SECRET)
+
+
+def sign(body: bytes) -> str:
+    return hmac.new(SECRET.encode(), body, hashlib.sha1).hexdigest()
+
+
+def test_verify_signature_accepts_the_body_digest(secret):
+    body = b'{"action": "change"}'
+
+    assert verify_signature(body, sign(body))
+    assert verify_signature(body, f" {sign(body).upper()} ")
+
+
+def test_verify_signature_rejects_another_body(secret):
+    assert not verify_signature(b'{"action": "delete"}', sign(b'{"action": "change"}'))
+
+
+def test_verify_signature_rejects_a_missing_header(secret):
+    assert not verify_signature(b"{}", None)
+
+
+def test_verify_signature_rejects_everything_without_a_secret(monkeypatch):
+    monkeypatch.setattr(taiga_webhook, "TAIGA_WEBHOOK_SECRET", None)
+
+    assert not verify_signature(b"{}", hmac.new(b"", b"{}", hashlib.sha1).hexdigest())
+
+
+def story_event(story: dict, subject: str, modified_date: str) -> dict:
+    return {
+        "type": "userstory", "action": "change",
+        "data": {
+            **story, "subject": subject, "modified_date": modified_date,
+            "project": {"id": story["project"]}, "status": {"id": story["status"], "name": "New"},
+        },
+    }
+
+
+def test_a_newer_story_event_updates_the_store_and_index(taiga):
+    story = taiga.stories[1]
+
+    async def apply():
+        await sync_story_store(full=True)
+        return await apply_webhook_event(story_event(story, "Renamed story", "2030-01-01T00:00:00Z"))
+
+    assert asyncio.run(apply()) == "applied"
+    assert story_store.get_story(1).subject == "Renamed story"
+    assert text_index.search("stories", "Renamed story", limit=1)[0][0] == 1
+
+
+def test_an_out_of_order_story_event_is_ignored(taiga):
+    story = taiga.stories[1]
+
+    async def apply():
+        await sync_story_store(full=True)
+        await apply_webhook_event(story_event(story, "Latest subject", "2030-01-02T00:00:00Z"))
+        return await apply_webhook_event(story_event(story, "Older subject", "2030-01-01T00:00:00Z"))
+
+    assert asyncio.run(apply()) == "stale"
+    assert story_store.get_story(1).subject == "Latest subject"
+
+
+def test_an_out_of_order_task_event_is_ignored(taiga):
+    task = taiga.tasks[2]
+    event = {
+        "type": "task", "action": "change",
+        "data": {**task, "subject": "Older task", "modified_date": "2000-01-01T00:00:00Z", "project": {"id": 1}},
+    }
+
+    async def apply():
+        await sync_story_store(full=True)
+        return await apply_webhook_event(event)
+
+    assert asyncio.run(apply()) == "stale"
+    assert story_store.get_task(2).subject == task["subject"]
+
+
+def test_events_for_other_projects_are_ignored(taiga):
+    story = {**taiga.stories[1], "project": 2}
+
+    async def apply():
+        await sync_story_store(full=True)
+        return await apply_webhook_event(story_event(story, "Elsewhere", "2030-01-01T00:00:00Z"))
+
+    assert asyncio.run(apply()) == "ignored"
+    assert story_store.get_story(1).subject == taiga.stories[1]["subject"]
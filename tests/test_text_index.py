@@ -0,0 +1,59 @@
+from app.services.llm_service.text_index import TextIndex
+
+
+def ids(results: list) -> list[int]:
+    return [result[0] for result in results]
+
+
+def test_upsert_adds_entries_to_a_new_scope():
+    index = TextIndex()
+
+    index.upsert("stories", [(1, "Set up the CI pipeline"), (2, "Add dark mode")])
+
+    assert index.has_scope("stories")
+    assert index.search("stories", "set up the CI pipeline!", limit=5)[0] == (1, "Set up the CI pipeline", 100.0, 100.0)
+
+
+def test_upsert_reindexes_a_changed_subject():
+    index = TextIndex()
+    index.build("stories", [(1, "Set up the CI pipeline")])
+
+    index.upsert("stories", [(1, "Migrate the database")])
+
+    assert ids(index.search("stories", "Migrate the database", limit=5)) == [1]
+    assert index.search("stories", "Set up the CI pipeline", limit=5)[0][2] < 100
+
+
+def test_upsert_keeps_other_entries():
+    index = TextIndex()
+    index.build("stories", [(1, "Set up the CI pipeline"), (2, "Add dark mode")])
+
+    index.upsert("stories", [(1, "Set up the CI pipeline"), (3, "Add light mode")])
+
+    assert ids(index.search("stories", "Add dark mode", limit=1)) == [2]
+    assert ids(index.search("stories", "Add light mode", limit=1)) == [3]
+
+
+def test_remove_drops_the_entry_from_every_lookup():
+    index = TextIndex()
+    index.build("stories", [(1, "Set up the CI pipeline"), (2, "Set up the CD pipeline")])
+
+    index.remove("stories", 1)
+
+    assert 1 not in ids(index.search("stories", "Set up the CI pipeline", limit=5))
+    assert ids(index.search("stories", "Set up the CD pipeline", limit=5))[0] == 2
+
+
+def test_remove_from_an_unknown_scope_is_a_no_op():
+    index = TextIndex()
+
+    index.remove("tasks:1", 1)
+
+    assert not index.has_scope("tasks:1")
+
+
+def test_scopes_are_searched_separately():
+    index = TextIndex()
+    index.upsert("tasks:1", [(10, "Write the tests")])
+
+    assert index.search("tasks:2", "Write the tests", limit=5) == []
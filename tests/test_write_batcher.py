@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from app.services.taiga_service import write_batcher as write_batcher_module
+from app.services.taiga_service.write_batcher import WriteBatcher, _match_created
+
+
+def story(subject: str, **fields) -> dict:
+    return {"project": 1, "status": 1, "subject": subject, **fields}
+
+
+def test_match_created_pairs_repeated_subjects_in_id_order():
+    created = [
+        {"id": 12, "subject": "Same"}, {"id": 10, "subject": "Same"}, {"id": 11, "subject": "Other"},
+    ]
+
+    items = _match_created(["Same", "Other", "Same"], created)
+
+    assert [item["id"] for item in items] == [10, 11, 12]
+
+
+def test_match_created_rejects_a_short_response():
+    with pytest.raises(RuntimeError):
+        _match_created(["One", "Two"], [{"id": 1, "subject": "One"}])
+
+
+def test_match_created_rejects_unknown_subjects():
+    with pytest.raises(RuntimeError):
+        _match_created(["One", "Two"], [{"id": 1, "subject": "One"}, {"id": 2, "subject": "two"}])
+
+
+def test_single_create_uses_the_regular_endpoint(taiga):
+    batcher = WriteBatcher(True, window=0.01, max_size=10)
+
+    item = asyncio.run(batcher.create_user_story(story("Alone", description="Details")))
+
+    assert item["subject"] == "Alone" and item["description"] == "Details"
+    assert taiga.calls.get("POST /userstories") == 1
+    assert "POST /userstories/bulk_create" not in taiga.calls
+
+
+def test_concurrent_creates_share_one_bulk_call_and_keep_their_fields(taiga):
+    batcher = WriteBatcher(True, window=0.01, max_size=10)
+
+    async def create():
+        return await asyncio.gather(
+            batcher.create_user_story(story("First", description="One")),
+            batcher.create_user_story(story("Second", description="Two")),
+            batcher.create_task(1, {"project": 1, "status": 1, "subject": "Sub-task"}),
+        )
+
+    first, second, task = asyncio.run(create())
+
+    assert (first["subject"], first["description"]) == ("First", "One")
+    assert (second["subject"], second["description"]) == ("Second", "Two")
+    assert task["user_story"] == 1
+    assert taiga.calls["POST /userstories/bulk_create"] == 1
+    assert taiga.calls["PATCH /userstories/{id}"] == 2
+    # The lone sub-task was in a group of its own
+    assert taiga.calls.get("POST /tasks") == 1
+
+
+def test_a_full_group_is_sent_without_waiting_for_the_window(taiga):
+    batcher = WriteBatcher(True, window=30, max_size=2)
+
+    async def create():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.create_user_story(story("A")), batcher.create_user_story(story("B"))), timeout=5
+        )
+
+    items = asyncio.run(create())
+
+    assert [item["subject"] for item in items] == ["A", "B"]
+    assert taiga.calls["POST /userstories/bulk_create"] == 1
+    assert "PATCH /userstories/{id}" not in taiga.calls
+
+
+def test_a_failed_bulk_call_fails_every_caller(taiga, monkeypatch):
+    async def failing_bulk_create(*args):
+        raise RuntimeError("Taiga is down")
+
+    monkeypatch.setattr(write_batcher_module, "bulk_create_user_stories", failing_bulk_create)
+    batcher = WriteBatcher(True, window=0.01, max_size=10)
+
+    async def create():
+        return await asyncio.gather(
+            batcher.create_user_story(story("A")), batcher.create_user_story(story("B")), return_exceptions=True
+        )
+
+    results = asyncio.run(create())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_subjects_the_bulk_endpoint_would_change_are_created_one_by_one(taiga):
+    batcher = WriteBatcher(True, window=0.01, max_size=10)
+
+    async def create():
+        return await asyncio.gather(
+            batcher.create_user_story(story(" Padded ")), batcher.create_user_story(story("Two\nlines")),
+        )
+
+    items = asyncio.run(create())
+
+    assert [item["subject"] for item in items] == [" Padded ", "Two\nlines"]
+    assert taiga.calls["POST /userstories"] == 2